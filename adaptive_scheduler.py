@@ -0,0 +1,137 @@
+import time
+
+# --- Configuration ---
+CPU_BUDGET = 0.005            # Fraction of one core the monitor may spend on itself (0.5%)
+IDLE_CPU_THRESHOLD = 10.0     # System CPU % below which the machine counts as idle
+IDLE_TICKS_BEFORE_CHEAP = 5   # Consecutive idle ticks before switching to cheap metrics only
+ANOMALY_BOOST_SECONDS = 120   # How long to sample at full speed after an anomaly fires
+MAX_PROCESS_SCAN_STRIDE = 10  # Scan the process table at least every Nth tick
+MAX_INTERVAL_FACTOR = 4       # Slowest interval, as a multiple of the base interval
+COST_SMOOTHING = 0.3          # Weight of the newest tick in the running cost averages
+
+class AdaptiveScheduler:
+    """
+    Keeps a periodic monitoring loop within a CPU overhead budget.
+
+    Each tick is wrapped in begin_tick() / end_tick(). The scheduler measures
+    the CPU time the monitor itself spent on the tick and picks the cheapest
+    schedule that fits the budget:
+      1. Process-table scans back off first (scan only every Nth tick).
+      2. Only if that is not enough is the tick interval stretched.
+    When the machine has been idle for a while, process scans stop entirely
+    and only the cheap metrics are sampled. report_anomaly() switches to the
+    fastest schedule for a short while so the alert can be followed closely.
+    """
+
+    def __init__(self, base_interval, budget=CPU_BUDGET, min_interval=None, max_interval=None):
+        self.base_interval = base_interval
+        self.budget = budget
+        self.min_interval = min_interval if min_interval is not None else base_interval / 2
+        self.max_interval = max_interval if max_interval is not None else base_interval * MAX_INTERVAL_FACTOR
+
+        # Running averages of CPU seconds spent per tick, split by tick type
+        self.cheap_cost = None
+        self.scan_cost = None
+
+        self.scan_stride = 1
+        self.interval = base_interval
+        self.mode = "normal"  # "normal", "idle" or "boost"
+
+        self._ticks_since_scan = MAX_PROCESS_SCAN_STRIDE  # Scan on the very first tick
+        self._idle_ticks = 0
+        self._boost_until = 0.0
+        self._tick_started = None
+
+    def begin_tick(self):
+        """Marks the start of a monitoring tick."""
+        self._tick_started = time.process_time()
+
+    def should_scan_processes(self):
+        """Whether the tick underway should include a process-table scan."""
+        if self.mode == "boost":
+            return True
+        if self.mode == "idle":
+            return False
+        return self._ticks_since_scan + 1 >= self.scan_stride
+
+    def end_tick(self, system_cpu=None, scanned=False):
+        """
+        Records the cost of the tick that just finished and re-plans the schedule.
+        system_cpu: the system-wide CPU load observed during the tick, used for idle detection.
+        scanned: whether the tick included a process-table scan.
+        """
+        if self._tick_started is None:
+            return
+        cost = time.process_time() - self._tick_started
+        self._tick_started = None
+
+        if scanned:
+            self._ticks_since_scan = 0
+            # The scan cost is whatever the tick cost on top of a cheap tick
+            extra = max(cost - (self.cheap_cost or 0.0), 0.0)
+            self.scan_cost = self._smooth(self.scan_cost, extra)
+        else:
+            self._ticks_since_scan += 1
+            self.cheap_cost = self._smooth(self.cheap_cost, cost)
+
+        if system_cpu is not None and system_cpu < IDLE_CPU_THRESHOLD:
+            self._idle_ticks += 1
+        else:
+            self._idle_ticks = 0
+
+        self._plan()
+
+    def report_anomaly(self):
+        """Switches to the fastest schedule for ANOMALY_BOOST_SECONDS."""
+        self._boost_until = time.monotonic() + ANOMALY_BOOST_SECONDS
+        self._idle_ticks = 0
+        self._plan()
+
+    def next_interval(self):
+        """Seconds to wait before the next tick."""
+        return self.interval
+
+    def overhead(self):
+        """Estimated fraction of one core used by the current schedule."""
+        cheap = self.cheap_cost or 0.0
+        scan = 0.0 if self.mode == "idle" else (self.scan_cost or 0.0) / self.scan_stride
+        return (cheap + scan) / self.interval
+
+    def _smooth(self, average, sample):
+        if average is None:
+            return sample
+        return average + COST_SMOOTHING * (sample - average)
+
+    def _plan(self):
+        cheap = self.cheap_cost or 0.0
+        scan = self.scan_cost or 0.0
+
+        if time.monotonic() < self._boost_until:
+            # An anomaly is being followed: the budget is deliberately ignored
+            self.mode = "boost"
+            self.scan_stride = 1
+            self.interval = self.min_interval
+            return
+
+        if self._idle_ticks >= IDLE_TICKS_BEFORE_CHEAP:
+            self.mode = "idle"
+            self.scan_stride = 1
+            self.interval = self._clamp(max(self.base_interval, cheap / self.budget))
+            return
+
+        self.mode = "normal"
+        allowed = self.budget * self.base_interval  # CPU seconds per tick at the base interval
+
+        # Back off process scans first: smallest stride that fits the budget
+        self.scan_stride = MAX_PROCESS_SCAN_STRIDE
+        for stride in range(1, MAX_PROCESS_SCAN_STRIDE + 1):
+            if cheap + scan / stride <= allowed:
+                self.scan_stride = stride
+                break
+
+        # Then stretch the interval if even the slowest scan rate is too expensive
+        needed = (cheap + scan / self.scan_stride) / self.budget
+        self.interval = self._clamp(max(self.base_interval, needed))
+
+    def _clamp(self, interval):
+        return min(max(interval, self.min_interval), self.max_interval)
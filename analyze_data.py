@@ -1,86 +1,153 @@
-import pandas as pd
 import json
-from datetime import datetime
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import battery_model
 
 # --- Configuration ---
 INPUT_CSV = "system_log.csv"
 OUTPUT_JSON = "user_profile.json"
+PARTITION_DAYS = 7  # Each worker process aggregates this many days of history
 
 # Define your typical "work hours" to separate the data
 WORK_START_HOUR = 9  # 9 AM
 WORK_END_HOUR = 23 # 11 PM
 WORK_DAYS = [0, 1, 2, 3, 4, 5, 6] # 0=Monday, ..., 6=Sunday
 
-def analyze_performance_data():
+def get_partitions(first_timestamp, last_timestamp, days=PARTITION_DAYS):
+    """Splits the history into [start, end) timestamp-string ranges of 'days' days each."""
+    start = datetime.strptime(first_timestamp[:10], "%Y-%m-%d")
+    last = datetime.strptime(last_timestamp[:19], "%Y-%m-%d %H:%M:%S")
+    partitions = []
+    while start <= last:
+        end = start + timedelta(days=days)
+        partitions.append((start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")))
+        start = end
+    return partitions
+
+def aggregate_partition(db_path, start, end):
+    """Worker: computes the partial aggregates of one partition straight from SQLite."""
+    from database_manager import get_database_manager
+    db = get_database_manager(db_path)
+    partial = db.get_partition_aggregates(start, end, WORK_DAYS, WORK_START_HOUR, WORK_END_HOUR)
+    partial['battery'] = battery_model.summarize_partition(db.get_battery_samples(start, end))
+    return partial
+
+def merge_partials(partials):
+    """
+    Combines per-partition aggregates (in time order) into the profile statistics.
+    CPU mean/std come from the summed count/sum/sum-of-squares; the battery
+    sessions are collected and the drain model sums are added up.
+    """
+    totals = {'work': [0, 0.0, 0.0], 'off': [0, 0.0, 0.0]}
+    sessions, load_sums = [], [0.0] * 5
+
+    for partial in partials:
+        for key in totals:
+            for i, value in enumerate(partial[key]):
+                totals[key][i] += value
+        sessions.extend(partial['battery']['sessions'])
+        for i, value in enumerate(partial['battery']['load_sums']):
+            load_sums[i] += value
+
+    def mean_std(count, total, total_sq):
+        if count == 0:
+            return None, None
+        mean = total / count
+        if count < 2:
+            return mean, None
+        # Sample standard deviation (ddof=1), matching pandas' .std()
+        variance = max(total_sq - total * total / count, 0.0) / (count - 1)
+        return mean, math.sqrt(variance)
+
+    return {
+        'work': (totals['work'][0], *mean_std(*totals['work'])),
+        'off': (totals['off'][0], *mean_std(*totals['off'])),
+        'drain': battery_model.fit_drain_model(sessions, load_sums),
+    }
+
+def build_profile(db_path=None, max_workers=None):
+    """
+    Computes the performance profile over the whole history.
+    The history is split into PARTITION_DAYS partitions that are aggregated in
+    parallel worker processes and then merged. max_workers=1 runs in-process.
+    Partition results are kept in the DatabaseManager's query cache, so a re-run
+    in the same process only recomputes partitions that received new rows.
+    Returns (profile, summary), or (None, None) if there is no data.
+    """
+    from database_manager import get_database_manager, DB_FILENAME
+
+    db_path = db_path or DB_FILENAME
+    db = get_database_manager(db_path)
+    first_timestamp, last_timestamp = db.get_time_bounds()
+    if first_timestamp is None:
+        return None, None
+
+    partitions = get_partitions(first_timestamp, last_timestamp)
+    watermark = db.get_watermark()
+    keys = [('partition', start, end, tuple(WORK_DAYS), WORK_START_HOUR, WORK_END_HOUR) for start, end in partitions]
+    partials = [db.get_range_cache(key, end) for key, (start, end) in zip(keys, partitions)]
+    missing = [i for i, partial in enumerate(partials) if partial is None]
+
+    if max_workers == 1 or len(missing) <= 1:
+        computed = [aggregate_partition(db_path, *partitions[i]) for i in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            computed = list(executor.map(
+                aggregate_partition, [db_path] * len(missing), *zip(*(partitions[i] for i in missing))))
+    for i, partial in zip(missing, computed):
+        partials[i] = partial
+        db.put_range_cache(keys[i], partial, watermark)
+
+    stats = merge_partials(partials)
+    work_count, work_avg, work_std = stats['work']
+    off_count, off_avg, off_std = stats['off']
+    avg_drain, drain_model = stats['drain']
+
+    def cpu_stats(avg, std):
+        # Statistics without enough rows are left out, so readers fall back to their defaults
+        return {key: value for key, value in (("avg", avg), ("std", std)) if value is not None}
+
+    profile = {
+        "work_hours_cpu": cpu_stats(work_avg, work_std),
+        "off_hours_cpu": cpu_stats(off_avg, off_std),
+        "avg_battery_drain_per_minute": avg_drain,
+        "battery_drain_model": drain_model,
+        "profile_creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    summary = {"partitions": len(partitions), "work_entries": work_count, "off_entries": off_count}
+    return profile, summary
+
+def analyze_performance_data(db_path=None, max_workers=None):
     """
-    Reads the system log, calculates performance and battery drain baselines,
+    Reads the logged history, calculates performance and battery drain baselines,
     and saves them to a JSON profile file.
     """
-    from database_manager import DatabaseManager
-    
     print(f"Analyzing data from database...")
     try:
-        db = DatabaseManager()
-        # Fetch up to 10,000 recent records for analysis (enough for a week of minute-by-minute data)
-        df = db.get_recent_history(limit=10000)
-        
-        if df.empty:
+        profile, summary = build_profile(db_path, max_workers)
+        if profile is None:
             print("No data found in database. Run the data logger first.")
             return
-
     except Exception as e:
         print(f"Error accessing database: {e}")
         return
 
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-    # --- NEW: Calculate Your Personal Battery Drain Rate ---
-    # 1. Filter the data to only include times when the laptop was unplugged.
-    discharging_df = df[df['is_charging'] == False].copy()
-    
-    # 2. Calculate the change in battery level between each 1-minute reading.
-    #    A positive number here means the battery level went down (a drain).
-    discharging_df['drain_rate'] = -discharging_df['battery_percentage'].diff()
-    
-    # 3. Calculate the average drain rate (percentage points per minute).
-    #    We use .dropna() to ignore the very first entry which has no previous point to compare to.
-    avg_drain_rate = discharging_df['drain_rate'].dropna().mean()
-    print(f"Calculated average battery drain rate: {avg_drain_rate:.2f}% per minute.")
-    
-    # --- The existing CPU/Memory analysis logic remains the same ---
-    is_workday = df['timestamp'].dt.dayofweek.isin(WORK_DAYS)
-    is_workhour = (df['timestamp'].dt.hour >= WORK_START_HOUR) & (df['timestamp'].dt.hour < WORK_END_HOUR)
-    work_hours_data = df[is_workday & is_workhour]
-    off_hours_data = df[~(is_workday & is_workhour)]
-
-    print(f"Found {len(work_hours_data)} entries for 'work hours'.")
-    print(f"Found {len(off_hours_data)} entries for 'off-hours'.")
-
-    # --- Compile all the learned intelligence into a single profile ---
-    profile = {
-        "work_hours_cpu": {
-            "avg": work_hours_data['cpu_load'].mean(),
-            "std": work_hours_data['cpu_load'].std()
-        },
-        "off_hours_cpu": {
-            "avg": off_hours_data['cpu_load'].mean(),
-            "std": off_hours_data['cpu_load'].std()
-        },
-        # --- NEW: Add the calculated drain rate to the profile ---
-        "avg_battery_drain_per_minute": avg_drain_rate,
-        "profile_creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
+    print(f"Aggregated {summary['partitions']} partitions of {PARTITION_DAYS} days.")
+    if profile["avg_battery_drain_per_minute"] is not None:
+        print(f"Calculated average battery drain rate: {profile['avg_battery_drain_per_minute']:.2f}% per minute.")
+    if profile["battery_drain_model"] is not None:
+        model = profile["battery_drain_model"]
+        print(f"Drain model from {model['sessions']} discharge sessions: "
+              f"{model['base_per_minute']:.3f}% + {model['per_cpu_percent_per_minute']:.5f}% per CPU % per minute.")
+    print(f"Found {summary['work_entries']} entries for 'work hours'.")
+    print(f"Found {summary['off_entries']} entries for 'off-hours'.")
+
     # --- Save the final profile to the JSON file ---
     with open(OUTPUT_JSON, 'w') as f:
         json.dump(profile, f, indent=4)
-        
+
     print(f"\nSuccessfully updated personal performance profile at '{OUTPUT_JSON}'")
 
 if __name__ == "__main__":
     analyze_performance_data()
-
-
-
-
-
@@ -0,0 +1,53 @@
+import json
+import math
+import time
+from datetime import datetime
+
+PROFILE_FILENAME = "user_profile.json"
+ALERT_COOLDOWN = 300  # Seconds before the same metric can alert again
+
+def load_user_profile(path=PROFILE_FILENAME):
+    """Returns the learned profile written by analyze_data.py, or None if there is none yet."""
+    try:
+        with open(path, 'r') as f: return json.load(f)
+    except FileNotFoundError: return None
+
+def _finite_or(value, default):
+    """'value' if it is a usable number; profiles can lack a statistic (null, NaN or missing)."""
+    return value if isinstance(value, (int, float)) and not math.isnan(value) else default
+
+class AnomalyDetector:
+    """
+    Compares live metrics with the user's learned profile.
+    Shared by the dashboard and the headless monitor; it only depends on the
+    metrics dictionaries from SystemMonitor, so it loads no GUI or data libraries.
+    """
+    def __init__(self, user_profile, cooldown=ALERT_COOLDOWN):
+        self.user_profile = user_profile
+        self.cooldown = cooldown
+        self.alert_cooldowns = {}
+
+    def check(self, metrics, now=None):
+        """Returns a list of (metric_key, title, message) for every metric outside its normal range."""
+        if not self.user_profile: return []
+        now = now or datetime.now()
+        is_work_hours = (now.weekday() < 5 and 9 <= now.hour < 18)
+        profile_key = 'work_hours_cpu' if is_work_hours else 'off_hours_cpu'
+        cpu_profile = self.user_profile.get(profile_key) or {}
+        cpu_avg = _finite_or(cpu_profile.get('avg'), 50)
+        cpu_std = _finite_or(cpu_profile.get('std'), 15)
+        cpu_threshold = cpu_avg + (2 * cpu_std)
+        current_cpu = metrics['cpu']['value']
+        anomalies = []
+        if current_cpu > cpu_threshold:
+            anomalies.append(("cpu", "High CPU Usage!", f"CPU load is at {current_cpu:.1f}%. Your average is {cpu_avg:.1f}%."))
+        return anomalies
+
+    def should_alert(self, metric_key):
+        """True if 'metric_key' has not alerted within the cooldown period (and starts a new one)."""
+        current_time = time.time()
+        last_alert_time = self.alert_cooldowns.get(metric_key, 0)
+        if (current_time - last_alert_time) > self.cooldown:
+            self.alert_cooldowns[metric_key] = current_time
+            return True
+        return False
@@ -1,15 +1,28 @@
+import sys
+
+if __name__ == "__main__" and "--headless" in sys.argv:
+    # Terminal mode: hand over before the GUI stack (customtkinter, matplotlib, pandas) is imported
+    from headless_monitor import main
+    sys.exit(main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+
 import customtkinter as ctk
 from datetime import datetime
-import json
-import time
 
 # --- Import all your custom project modules ---
 from system_monitor import SystemMonitor
+from shared_snapshot import SnapshotReader
 from health_calculator import HealthCalculator
+from anomaly_detector import AnomalyDetector, load_user_profile
+from battery_model import TimeToEmptyEstimator, format_minutes
+from database_manager import get_database_manager
+from trend_forecast import describe_trends
 from gauge_widget import CircularProgressGauge, LinearGaugeWidget
 from graph_window import GraphWindow
 from alert_window import AlertWindow
 from details_window import DetailsWindow
+from adaptive_scheduler import AdaptiveScheduler
+from event_journal import EventJournal
+from event_history_window import EventHistoryWindow
 
 # --- (No changes to your constants) ---
 WINDOW_WIDTH = 800
@@ -21,6 +34,8 @@ ACCENT_COLOR = "#4A90E2"
 GREEN = "#2CC990"
 ORANGE = "#F7A02B"
 RED = "#E94B3C"
+UPDATE_INTERVAL = 2.0  # Base seconds between dashboard refreshes (adapted at runtime)
+TREND_REFRESH_INTERVAL = 60  # Seconds between trend forecast refreshes (the logger adds a row about once a minute)
 
 class SystemHealthMonitorApp:
     def __init__(self, root):
@@ -28,24 +43,35 @@ class SystemHealthMonitorApp:
         self.root = root
         self.setup_window()
         self.system_monitor = SystemMonitor()
+        self.snapshot_reader = SnapshotReader()
         self.health_calculator = HealthCalculator()
+        self.scheduler = AdaptiveScheduler(UPDATE_INTERVAL)
+        self.journal = EventJournal()
         self.graph_win = None
         self.details_win = None
+        self.events_win = None
         self.user_profile = self.load_user_profile()
-        self.alert_cooldowns = {}
+        self.anomaly_detector = AnomalyDetector(self.user_profile)
+        self.drain_estimator = TimeToEmptyEstimator(self.user_profile)
         self.update_job = None
+        self.trend_job = None
+        self.latest_metrics = None
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.create_gui()
+        self.journal.log_event("app_start", "Dashboard started")
         self.update_loop()
+        self.update_trends()
 
     def on_closing(self):
         if self.update_job: self.root.after_cancel(self.update_job)
+        if self.trend_job: self.root.after_cancel(self.trend_job)
+        self.snapshot_reader.detach()
+        self.journal.log_event("app_stop", "Dashboard closed")
+        self.journal.close()
         self.root.destroy()
 
     def load_user_profile(self):
-        try:
-            with open("user_profile.json", 'r') as f: return json.load(f)
-        except FileNotFoundError: return None
+        return load_user_profile()
 
     # --- (No changes to setup_window, create_gui, create_header_frame, create_score_frame, create_metrics_frame) ---
     def setup_window(self):
@@ -102,7 +128,48 @@ class SystemHealthMonitorApp:
             if key in ["cpu", "memory"]:
                 gauge.details_button.grid()
                 gauge.details_button.configure(command=lambda k=key: self.show_details(k))
+
+        # Throughput rates are not percentages, so they are shown as text below the gauges
+        self.io_label = ctk.CTkLabel(metrics_frame, text="", font=("Segoe UI", 13), text_color="#AAB1C2", justify="left")
+        self.io_label.pack(anchor="w", pady=(5, 0), padx=10)
+        self.update_io_label(None, None)
+        self.battery_label = None
+        if self.system_monitor.has_battery():
+            self.battery_label = ctk.CTkLabel(metrics_frame, text="", font=("Segoe UI", 13), text_color="#AAB1C2")
+            self.battery_label.pack(anchor="w", pady=(2, 0), padx=10)
+        self.trend_label = ctk.CTkLabel(metrics_frame, text="", font=("Segoe UI", 13), text_color="#AAB1C2", justify="left")
+        self.trend_label.pack(anchor="w", pady=(2, 0), padx=10)
+
+    def update_io_label(self, disk_io, network):
+        disk_text = disk_io['display'] if disk_io else "--"
+        network_text = network['display'] if network else "--"
+        self.io_label.configure(text=f"💽 Disk I/O: {disk_text}\n🌐 Network: {network_text}")
+
+    def update_battery_label(self, metrics):
+        minutes = self.drain_estimator.update(metrics)  # Called every tick to keep the load average current
+        if not self.battery_label: return
+        battery = metrics.get('battery')
+        if battery and battery['charging']:
+            text = "⏳ Time to empty: charging"
+        elif minutes is not None:
+            text = f"⏳ Time to empty: ~{format_minutes(minutes)}"
+        else:
+            text = "⏳ Time to empty: -- (run analyze_data.py to learn your drain rate)"
+        self.battery_label.configure(text=text)
     
+    def get_trend_forecasts(self, metrics=None):
+        """Forecast texts from the running trend sums in the database (constant cost per call)."""
+        try:
+            return describe_trends(get_database_manager().get_trend_sums(), metrics)
+        except Exception as e:
+            print(f"Error computing trends: {e}")
+            return []
+
+    def update_trends(self):
+        forecasts = self.get_trend_forecasts(self.latest_metrics)
+        self.trend_label.configure(text="\n".join(f"📈 {text}" for text in forecasts) or "📈 Trends: no significant changes")
+        self.trend_job = self.root.after(TREND_REFRESH_INTERVAL * 1000, self.update_trends)
+
     # --- MODIFICATION: Add an "Export Report" button to the footer ---
     def create_footer_frame(self):
         footer_frame = ctk.CTkFrame(self.root, fg_color=FRAME_BG_COLOR, corner_radius=0)
@@ -122,6 +189,12 @@ class SystemHealthMonitorApp:
         )
         history_button.pack(side="right", padx=(10, 0))
 
+        events_button = ctk.CTkButton(
+            button_frame, text="🔔 Alert History", font=("Segoe UI", 12),
+            fg_color="#3D4460", hover_color="#565F82", command=self.open_events_window
+        )
+        events_button.pack(side="right", padx=(10, 0))
+
         # --- NEW "Export Report" button ---
         export_button = ctk.CTkButton(
             button_frame, text="📋 Export Report", font=("Segoe UI", 12),
@@ -137,16 +210,21 @@ class SystemHealthMonitorApp:
         else:
             self.graph_win.focus()
 
+    def open_events_window(self):
+        if self.events_win is None or not self.events_win.winfo_exists():
+            self.events_win = EventHistoryWindow(self.root)
+        else:
+            self.events_win.focus()
+
     def show_details(self, metric_type):
         if self.details_win is None or not self.details_win.winfo_exists():
             if metric_type == "cpu":
-                title = "Top 5 Processes by CPU Usage"
-                data = self.system_monitor.get_top_processes_by_cpu()
+                title = "Processes by CPU Usage"
             elif metric_type == "memory":
-                title = "Top 5 Processes by Memory Usage"
-                data = self.system_monitor.get_top_processes_by_memory()
+                title = "Processes by Memory Usage"
             else: return
-            self.details_win = DetailsWindow(title, data)
+            # The window reads the shared background snapshot, so opening it never blocks
+            self.details_win = DetailsWindow(title, sort_by=metric_type)
             self.details_win.grab_set()
         else:
             self.details_win.focus()
@@ -157,10 +235,13 @@ class SystemHealthMonitorApp:
         print("Generating health report...")
         
         # 1. Gather all necessary data
-        metrics = self.system_monitor.get_all_metrics()
+        metrics = self.snapshot_reader.latest() or self.system_monitor.get_all_metrics()
         health_score, status_info = self.health_calculator.calculate_health_score(metrics)
         system_info = self.system_monitor.get_system_info()
-        cpu_avg = self.user_profile['work_hours_cpu']['avg'] if self.user_profile else 'N/A'
+        cpu_avg = ((self.user_profile or {}).get('work_hours_cpu') or {}).get('avg')
+        cpu_avg_text = f"{cpu_avg:.1f}%" if isinstance(cpu_avg, (int, float)) and cpu_avg == cpu_avg else "N/A"
+        forecasts = self.get_trend_forecasts(metrics)
+        trend_items = "".join(f"<li>{text}</li>" for text in forecasts) or "<li>No significant changes in the logged history.</li>"
         
         # Helper to get metric values safely
         def get_metric_val(key):
@@ -198,11 +279,14 @@ class SystemHealthMonitorApp:
                 <h2>Live Metrics Breakdown</h2>
                 <table>
                     <tr><th>Metric</th><th>Current Value</th><th>Personal Average (Work Hours)</th></tr>
-                    <tr><td>CPU Load</td><td>{get_metric_val('cpu'):.1f}%</td><td>{cpu_avg:.1f}%</td></tr>
+                    <tr><td>CPU Load</td><td>{get_metric_val('cpu'):.1f}%</td><td>{cpu_avg_text}</td></tr>
                     <tr><td>Memory Usage</td><td>{get_metric_val('memory'):.1f}%</td><td>N/A</td></tr>
                     <tr><td>Disk Usage</td><td>{get_metric_val('disk'):.1f}%</td><td>N/A</td></tr>
                     {"<tr><td>Battery</td><td>"+f"{get_metric_val('battery'):.0f}%"+"</td><td>N/A</td></tr>" if metrics.get('battery') else ""}
                 </table>
+
+                <h2>Trends &amp; Forecasts</h2>
+                <ul>{trend_items}</ul>
             </div>
         </body>
         </html>
@@ -214,6 +298,7 @@ class SystemHealthMonitorApp:
             with open(filename, "w", encoding='utf-8') as f:
                 f.write(html_content)
             print(f"Report successfully saved as {filename}")
+            self.journal.log_event("report_export", f"Health report saved as {filename}")
             AlertWindow("Report Generated", f"Snapshot saved successfully as:\n{filename}")
         except Exception as e:
             print(f"Error saving report: {e}")
@@ -221,39 +306,37 @@ class SystemHealthMonitorApp:
 
     # --- (No changes to update_loop, check_for_anomalies, trigger_alert) ---
     def update_loop(self):
+        self.scheduler.begin_tick()
+        metrics = None
         try:
-            metrics = self.system_monitor.get_all_metrics()
+            # Use the data logger's live sample if it is running; otherwise sample ourselves.
+            # Non-blocking CPU read: the load is measured over the time since the previous tick
+            metrics = self.snapshot_reader.latest() or self.system_monitor.get_all_metrics(cpu_interval=None)
             self.check_for_anomalies(metrics)
             for key, gauge in self.gauges.items():
                 if metrics.get(key): gauge.update_value(metrics[key]['value'])
+            self.update_io_label(metrics.get('disk_io'), metrics.get('network'))
+            self.update_battery_label(metrics)
+            self.latest_metrics = metrics
             health_score, status_info = self.health_calculator.calculate_health_score(metrics)
             self.health_score_gauge.update_value(health_score, status_info['text'], status_info['color'])
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.status_label.configure(text=f"Last updated: {current_time}")
         except Exception as e:
             print(f"Error in update loop: {e}")
-        self.update_job = self.root.after(2000, self.update_loop)
+        system_cpu = metrics['cpu']['value'] if metrics else None
+        self.scheduler.end_tick(system_cpu=system_cpu)
+        self.update_job = self.root.after(int(self.scheduler.next_interval() * 1000), self.update_loop)
 
     def check_for_anomalies(self, metrics):
-        if not self.user_profile: return
-        now = datetime.now()
-        is_work_hours = (now.weekday() < 5 and 9 <= now.hour < 18)
-        profile_key = 'work_hours_cpu' if is_work_hours else 'off_hours_cpu'
-        cpu_profile = self.user_profile.get(profile_key, {})
-        cpu_avg = cpu_profile.get('avg', 50)
-        cpu_std = cpu_profile.get('std', 15)
-        cpu_threshold = cpu_avg + (2 * cpu_std)
-        current_cpu = metrics['cpu']['value']
-        if current_cpu > cpu_threshold:
-            self.trigger_alert("cpu", "High CPU Usage!", f"CPU load is at {current_cpu:.1f}%. Your average is {cpu_avg:.1f}%.")
+        for metric_key, title, message in self.anomaly_detector.check(metrics):
+            self.scheduler.report_anomaly()
+            self.trigger_alert(metric_key, title, message)
 
     def trigger_alert(self, metric_key, title, message):
-        current_time = time.time()
-        cooldown_period = 300
-        last_alert_time = self.alert_cooldowns.get(metric_key, 0)
-        if (current_time - last_alert_time) > cooldown_period:
+        if self.anomaly_detector.should_alert(metric_key):
             AlertWindow(title, message)
-            self.alert_cooldowns[metric_key] = current_time
+            self.journal.log_event("alert", f"{title} {message}")
 
 if __name__ == "__main__":
     root = ctk.CTk()
@@ -0,0 +1,141 @@
+# Battery discharge sessions and the load-conditioned drain model.
+# analyze_data.py fits the model over the logged history and stores it in the
+# profile; the dashboard turns it into a live time-to-empty estimate.
+
+MAX_SAMPLE_GAP = 600      # Seconds between samples that end a session (sleep, logger stopped)
+MIN_SESSION_MINUTES = 10  # Shorter sessions are too coarse for whole-percent battery readings
+MIN_SESSION_SAMPLES = 3
+CPU_SMOOTHING = 0.1       # Weight of the newest CPU reading in the live estimate's moving average
+
+def segment_sessions(timestamps, battery, charging, max_gap=MAX_SAMPLE_GAP):
+    """
+    Labels every row with its discharge session (0, 1, ...) or -1.
+    A session is a run of rows that are not charging and have a battery reading.
+    It also ends where consecutive samples are more than 'max_gap' seconds apart
+    (sleep, logger not running) or the battery went up (charged in between).
+    Returns (labels, number of sessions).
+    """
+    import numpy as np
+
+    discharging = (charging == 0) & ~np.isnan(battery)
+    starts = discharging.copy()
+    if len(starts) > 1:
+        continues = discharging[:-1] & (np.diff(timestamps) <= max_gap) & (np.diff(battery) <= 0)
+        starts[1:] &= ~continues
+    labels = np.cumsum(starts) - 1
+    labels[~discharging] = -1
+    return labels, int(starts.sum())
+
+def summarize_partition(samples, max_gap=MAX_SAMPLE_GAP):
+    """
+    Mergeable battery aggregates for one partition (see DatabaseManager.get_battery_samples):
+      'sessions':  [(minutes, drain per minute, mean cpu), ...], one least-squares fit per
+                   session long enough to measure; a session cut by the partition boundary
+                   is fitted as two
+      'load_sums': normal-equation sums for drain = base + per_cpu * cpu, over every pair
+                   of consecutive samples within a session
+    """
+    import numpy as np
+
+    labels, count = segment_sessions(samples['timestamp'], samples['battery_percentage'],
+                                     samples['is_charging'], max_gap)
+    if count == 0:
+        return {'sessions': [], 'load_sums': (0.0, 0.0, 0.0, 0.0, 0.0)}
+    rows = labels >= 0
+    labels = labels[rows]
+    timestamps = samples['timestamp'][rows]
+    battery = samples['battery_percentage'][rows]
+    cpu = samples['cpu_load'][rows]
+
+    # Per-session fit of battery against minutes since the session started, all sessions at once
+    first = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    last = np.r_[first[1:] - 1, len(labels) - 1]
+    minutes = (timestamps - timestamps[first][labels]) / 60.0
+    n = np.bincount(labels, minlength=count)
+    sum_t = np.bincount(labels, minutes, count)
+    sum_tt = np.bincount(labels, minutes * minutes, count)
+    sum_y = np.bincount(labels, battery, count)
+    sum_ty = np.bincount(labels, minutes * battery, count)
+    has_cpu = ~np.isnan(cpu)
+    cpu_count = np.bincount(labels, has_cpu, count)
+    cpu_sum = np.bincount(labels, np.where(has_cpu, cpu, 0.0), count)
+    duration = minutes[last]
+    denominator = n * sum_tt - sum_t * sum_t
+
+    valid = (n >= MIN_SESSION_SAMPLES) & (duration >= MIN_SESSION_MINUTES) & (denominator > 0) & (cpu_count > 0)
+    slope = (n[valid] * sum_ty[valid] - sum_t[valid] * sum_y[valid]) / denominator[valid]
+    sessions = list(zip(duration[valid].tolist(), (-slope).tolist(), (cpu_sum[valid] / cpu_count[valid]).tolist()))
+
+    # Drop over each interval: drop = (base + per_cpu * cpu) * dt, with the CPU load the
+    # logger measured over that same interval (it is stored with the interval's end)
+    same = (labels[1:] == labels[:-1]) & has_cpu[1:]
+    dt = np.diff(minutes)[same]
+    drop = -np.diff(battery)[same]
+    load = cpu[1:][same]
+    load_sums = (float(np.sum(dt * dt)), float(np.sum(load * dt * dt)), float(np.sum(load * load * dt * dt)),
+                 float(np.sum(drop * dt)), float(np.sum(drop * load * dt)))
+    return {'sessions': sessions, 'load_sums': load_sums}
+
+def fit_drain_model(sessions, load_sums):
+    """
+    Combines the merged partition aggregates into the profile's drain statistics.
+    Returns (average drain per minute weighted by session length, model dict),
+    or (None, None) without any usable discharge session.
+    The CPU term is only kept if the fit is physically sensible (no negative
+    drain at any load); otherwise the model is the constant average drain.
+    """
+    import numpy as np
+
+    if not sessions:
+        return None, None
+    minutes, drains, _ = np.array(sessions, dtype=np.float64).T
+    average = float(np.average(drains, weights=minutes))
+
+    s11, s12, s22, y1, y2 = load_sums
+    base, per_cpu = average, 0.0
+    determinant = s11 * s22 - s12 * s12
+    if s11 > 0 and determinant > 1e-9 * s11 * s22:
+        fitted_per_cpu = (s11 * y2 - s12 * y1) / determinant
+        fitted_base = (s22 * y1 - s12 * y2) / determinant
+        if fitted_base >= 0 and fitted_per_cpu >= 0:
+            base, per_cpu = fitted_base, fitted_per_cpu
+
+    model = {
+        "base_per_minute": base,
+        "per_cpu_percent_per_minute": per_cpu,
+        "sessions": len(sessions),
+        "session_minutes": float(minutes.sum()),
+    }
+    return average, model
+
+def format_minutes(minutes):
+    """Formats a duration for display, e.g. '3 h 20 min'."""
+    hours, rest = divmod(int(round(minutes)), 60)
+    return f"{hours} h {rest:02d} min" if hours else f"{rest} min"
+
+class TimeToEmptyEstimator:
+    """
+    Live time-to-empty from the profile's drain model. Each update is O(1):
+    the CPU load is smoothed with an exponential moving average and plugged
+    into the linear model, and the battery level is divided by the result.
+    """
+    def __init__(self, user_profile, smoothing=CPU_SMOOTHING):
+        self.model = (user_profile or {}).get('battery_drain_model')
+        self.smoothing = smoothing
+        self.smoothed_cpu = None
+
+    def update(self, metrics):
+        """Returns the minutes until the battery is empty, or None (no battery, charging or no model)."""
+        cpu = metrics['cpu']['value']
+        if self.smoothed_cpu is None:
+            self.smoothed_cpu = cpu
+        else:
+            self.smoothed_cpu += self.smoothing * (cpu - self.smoothed_cpu)
+
+        battery = metrics.get('battery')
+        if not self.model or not battery or battery['charging']:
+            return None
+        drain = self.model['base_per_minute'] + self.model['per_cpu_percent_per_minute'] * self.smoothed_cpu
+        if drain <= 0:
+            return None
+        return battery['value'] / drain
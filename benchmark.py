@@ -0,0 +1,498 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Benchmarks for the parts of the monitor that have to scale.
+# Usage: python benchmark.py <name> [options]   (see --help)
+
+
+# --- Synthetic history ---
+def build_synthetic_db(db_path, rows, step_seconds=10):
+    """
+    Fills a fresh database with 'rows' synthetic metric entries, 'step_seconds'
+    apart, with charge/discharge cycles (drain rising with CPU load) and a
+    handful of recurring processes.
+    """
+    import sqlite3
+    from database_manager import DatabaseManager
+
+    db = DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous=OFF')
+    names = ["chrome", "code", "python", "slack", "explorer", "teams", "zoom", "spotify"]
+    for name in names:
+        db._get_process_name_id(conn.cursor(), name)
+
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    battery, charging = 100.0, False
+
+    def generate():
+        nonlocal battery, charging
+        for i in range(rows):
+            timestamp = start + timedelta(seconds=i * step_seconds)
+            cpu_load = rng.uniform(0, 100)
+            if charging:
+                battery = min(100.0, battery + 0.15)
+                charging = battery < 100.0
+            else:
+                battery = max(0.0, battery - 0.01 - 0.0004 * cpu_load)  # Drains faster under load
+                charging = battery < 15.0
+            yield (timestamp.strftime("%Y-%m-%d %H:%M:%S"), cpu_load, rng.uniform(20, 90),
+                   int(battery), int(charging), None, rng.uniform(0, 50))
+
+    conn.executemany('''
+        INSERT INTO metrics (timestamp, cpu_load, memory_usage, battery_percentage, is_charging, top_process_name, top_process_cpu)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', generate())
+    # Rank-0 CPU process per row, so the interned names are used by the loaders
+    conn.execute(f'''
+        INSERT INTO top_processes (metric_id, kind, rank, name_id, value_permille)
+        SELECT id, 0, 0, (id % {len(names)}) + 1, CAST(top_process_cpu * 10 AS INTEGER) FROM metrics
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def _timed(label, func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label}: {time.perf_counter() - started:.2f}s")
+    return result
+
+
+# --- Parallel partitioned history analysis ---
+def bench_analysis(args):
+    import analyze_data
+    from database_manager import get_database_manager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "analysis_bench.db")
+        _timed(f"Building {args.rows:,} synthetic rows", build_synthetic_db, db_path, args.rows)
+        db = get_database_manager(db_path)
+
+        # Both rebuilds start cold: otherwise the second is served from the partition cache
+        db.clear_cache()
+        serial, summary = _timed("Serial rebuild (1 process)", analyze_data.build_profile, db_path, max_workers=1)
+        db.clear_cache()
+        workers = args.workers or os.cpu_count()
+        parallel, _ = _timed(f"Parallel rebuild ({workers} processes)",
+                             analyze_data.build_profile, db_path, max_workers=workers)
+        print(f"{summary['partitions']} partitions of {analyze_data.PARTITION_DAYS} days; "
+              f"results match: {serial['work_hours_cpu'] == parallel['work_hours_cpu']}, "
+              f"drain model: {serial['battery_drain_model'] == parallel['battery_drain_model']}")
+
+
+# --- Query cache ---
+def bench_cache(args):
+    import sqlite3
+    import analyze_data
+    from database_manager import get_database_manager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cache_bench.db")
+        _timed(f"Building {args.rows:,} synthetic rows", build_synthetic_db, db_path, args.rows)
+        db = get_database_manager(db_path)
+
+        _timed("History load (cold)", db.get_recent_history, args.limit)
+        _timed("History load (unchanged data)", db.get_recent_history, args.limit)
+        _timed("Profile rebuild (cold)", analyze_data.build_profile, db_path, max_workers=1)
+        _timed("Profile rebuild (unchanged data)", analyze_data.build_profile, db_path, max_workers=1)
+
+        # One more logged entry: only the new row and the open partition are re-read
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO metrics (timestamp, cpu_load, memory_usage, is_charging) "
+                     "SELECT datetime(MAX(timestamp), '+10 seconds'), 50, 50, 0 FROM metrics")
+        conn.commit()
+        conn.close()
+        _timed("History load (one new row)", db.get_recent_history, args.limit)
+        _timed("Profile rebuild (one new row)", analyze_data.build_profile, db_path, max_workers=1)
+
+
+# --- Compact history loads ---
+def _measure_load(label, load):
+    import tracemalloc
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    held = df.memory_usage(deep=True).sum()
+    print(f"{label:<10} {elapsed:6.2f}s  held: {held / 1e6:8.1f} MB  peak while loading: {peak / 1e6:8.1f} MB")
+    return df
+
+
+def bench_memory(args):
+    from database_manager import get_database_manager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory_bench.db")
+        _timed(f"Building {args.rows:,} synthetic rows", build_synthetic_db, db_path, args.rows)
+        db = get_database_manager(db_path)
+
+        regular = _measure_load("Regular", lambda: db.get_recent_history(limit=args.rows))
+        compact = _measure_load("Compact", lambda: db.get_history_compact(limit=args.rows))
+        print(f"Rows: {len(regular):,} / {len(compact):,}")
+        print(f"Held memory ratio: {regular.memory_usage(deep=True).sum() / compact.memory_usage(deep=True).sum():.1f}x")
+
+
+# --- Monitor responsiveness under load ---
+def bench_latency(args):
+    import statistics
+    import subprocess
+    import sys
+    import threading
+    from system_monitor import SystemMonitor
+
+    monitor = SystemMonitor()
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_generator.py"),
+               "--cores", str(args.cores), "--duty", str(args.duty), "--duration", str(args.duration)]
+    generator = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+    load_started = None
+    def read_timeline():
+        nonlocal load_started
+        for line in generator.stdout:
+            if json.loads(line)["event"] == "load_started":
+                load_started = time.monotonic()
+    reader = threading.Thread(target=read_timeline, daemon=True)
+    reader.start()
+
+    latencies, detection_delay = [], None
+    while generator.poll() is None:
+        started = time.perf_counter()
+        metrics = monitor.get_all_metrics(cpu_interval=None)
+        latencies.append(time.perf_counter() - started)
+        if load_started is not None and detection_delay is None and metrics['cpu']['value'] >= args.threshold:
+            detection_delay = time.monotonic() - load_started
+        time.sleep(args.interval)
+    reader.join(timeout=5)
+
+    latencies.sort()
+    print(f"Load: {args.cores} cores at {args.duty:.0%} duty for {args.duration}s, sampling every {args.interval}s")
+    print(f"Sampling latency: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms "
+          f"over {len(latencies)} samples")
+    if detection_delay is None:
+        print(f"CPU never reached the {args.threshold}% threshold.")
+    else:
+        print(f"Detection delay (load start -> CPU >= {args.threshold}%): {detection_delay:.2f}s")
+
+
+# --- Headless vs GUI startup ---
+def _run_measured(command, poll_interval=0.005):
+    """
+    Runs 'command' to completion; returns (exit code, wall seconds, peak RSS in MB, stderr).
+    The peak is Windows' peak working set where psutil reports it, otherwise the
+    highest RSS seen while polling every 'poll_interval' seconds (which can slightly undershoot).
+    """
+    import subprocess
+    import psutil
+
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=stderr, text=True)
+        peak = 0
+        try:
+            child = psutil.Process(process.pid)
+            while process.poll() is None:
+                memory = child.memory_info()
+                peak = max(peak, getattr(memory, 'peak_wset', memory.rss))
+                time.sleep(poll_interval)
+        except psutil.NoSuchProcess:  # Exited between the poll and the read
+            pass
+        process.wait()
+        elapsed = time.perf_counter() - started
+        stderr.seek(0)
+        return process.returncode, elapsed, peak / 2**20, stderr.read()
+
+
+def bench_startup(args):
+    import statistics
+    import sys
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    app_path = os.path.join(here, "app.py")
+    commands = {
+        # One complete sample (monitor, health score, anomaly check, JSON output), then exit
+        "Headless (--headless --once --json)": [sys.executable, app_path, "--headless", "--once", "--json"],
+        # Only imports what the dashboard needs: no window and no sample, so a lower bound for the GUI
+        "GUI imports only (lower bound)": [sys.executable, "-c", f"import sys; sys.path.insert(0, {here!r}); import app"],
+    }
+    for label, command in commands.items():
+        runs = [_run_measured(command) for _ in range(args.runs)]
+        code, _, _, stderr = runs[-1]
+        if code != 0:
+            print(f"{label:<38} failed: {stderr.strip().splitlines()[-1] if stderr.strip() else f'exit code {code}'}")
+            continue
+        print(f"{label:<38} median {statistics.median(r[1] for r in runs):6.2f}s  "
+              f"peak RSS {max(r[2] for r in runs):7.1f} MB  ({args.runs} runs)")
+
+
+# --- Fleet collector ingest throughput ---
+async def _simulated_agent(port, host_name, batches, batch_size, start_time):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    timestamp = start_time
+    for _ in range(batches):
+        rows = []
+        for _ in range(batch_size):
+            timestamp += timedelta(seconds=60)
+            rows.append({
+                "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "cpu_load": random.uniform(0, 100),
+                "memory_usage": random.uniform(20, 90),
+                "battery_percentage": random.randint(5, 100),
+                "is_charging": random.randint(0, 1),
+            })
+        writer.write(json.dumps({"op": "ingest", "host": host_name, "metrics": rows}).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        assert response.get("accepted") == batch_size, response
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _run_fleet(args, db_path):
+    from fleet_collector import FleetCollector, FleetStore
+
+    store = FleetStore(db_path)
+    collector = FleetCollector(store, port=0)
+    await collector.start()
+
+    start_time = datetime(2025, 1, 1)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _simulated_agent(collector.port, f"laptop-{i:04d}", args.batches, args.batch_size, start_time)
+        for i in range(args.agents)))
+    elapsed = time.perf_counter() - started
+
+    await collector.stop()
+    rows = collector.rows_ingested
+    print(f"Agents: {args.agents}  batches/agent: {args.batches}  rows/batch: {args.batch_size}")
+    print(f"Ingested {rows} rows in {elapsed:.2f}s -> {rows / elapsed:,.0f} rows/s, "
+          f"{collector.commits} group commits ({rows / max(collector.commits, 1):,.0f} rows/commit)")
+
+    started = time.perf_counter()
+    percentiles = store.get_percentiles("cpu_load")
+    worst = store.get_worst_hosts("cpu_load", limit=3)
+    print(f"Fleet CPU percentiles: {percentiles} ({time.perf_counter() - started:.3f}s incl. worst hosts)")
+    print(f"Worst hosts by CPU: {[(name, round(avg, 1)) for name, avg, _ in worst]}")
+    store.close()
+
+
+def bench_fleet(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_run_fleet(args, os.path.join(tmp, "fleet_bench.db")))
+
+
+# --- Correctness checks for the pure aggregation code ---
+def check_counter_rates():
+    """A device reset, a hot-plugged device and a removed one, on a fake monotonic clock."""
+    from collections import namedtuple
+    from unittest import mock
+    from system_monitor import CounterRates
+
+    Counters = namedtuple("Counters", ["read_bytes", "read_count"])
+    snapshots = [
+        {"sda": Counters(100, 10)},
+        {"sda": Counters(150, 12), "sdb": Counters(5, 1)},   # sdb plugged in: no baseline yet
+        {"sda": Counters(20, 1), "sdb": Counters(15, 3)},    # sda reset: skipped for this interval
+        {"sda": Counters(30, 2)},                            # sdb removed
+        {"sda": Counters(30, 2), "sdb": Counters(100, 9)},   # sdb back: needs a new baseline
+    ]
+    expected = [
+        None,
+        (2.0, {"sda": {"read_bytes": 50, "read_count": 2}}),
+        (2.0, {"sdb": {"read_bytes": 10, "read_count": 2}}),
+        (2.0, {"sda": {"read_bytes": 10, "read_count": 1}}),
+        (2.0, {"sda": {"read_bytes": 0, "read_count": 0}}),
+    ]
+    rates = CounterRates()
+    with mock.patch("system_monitor.time.monotonic", side_effect=[0.0, 2.0, 4.0, 6.0, 8.0]):
+        for snapshot, want in zip(snapshots, expected):
+            got = rates.update(snapshot)
+            assert got == want, f"CounterRates.update: expected {want}, got {got}"
+
+
+def _planted_battery_samples(base, per_cpu):
+    """
+    Four discharge sessions of 30 one-minute samples that drain exactly
+    base + per_cpu * cpu per minute. They are separated by a logged charge, a
+    two hour gap and a battery level that went up without a charge being
+    logged. Returns the get_battery_samples() arrays.
+    """
+    import numpy as np
+
+    rows = []  # (timestamp, battery, charging, cpu)
+    t, level = 0, 95.0
+    for session in range(4):
+        for i in range(30):
+            load = (10, 50, 90)[(i + session) % 3]
+            if i:
+                t += 60
+                level -= base + per_cpu * load  # The load is stored with the end of its interval
+            rows.append((t, level, 0, load))
+        if session == 0:
+            for _ in range(5):  # Plugged in
+                t += 60
+                level += 1.0
+                rows.append((t, level, 1, 20))
+        if session == 2:
+            level += 5.0  # Charged while the logger was not running
+        t += 2 * 3600 if session == 1 else 60
+    timestamps, battery, charging, cpu = zip(*rows)
+    return {'timestamp': np.array(timestamps, dtype=np.int64), 'battery_percentage': np.array(battery),
+            'is_charging': np.array(charging, dtype=np.uint8), 'cpu_load': np.array(cpu, dtype=np.float64)}
+
+
+def check_battery_model():
+    """Session segmentation and the drain model recover a planted drain, also when merged from partitions."""
+    import math
+    import statistics
+    import battery_model
+    from analyze_data import merge_partials
+
+    base, per_cpu = 0.05, 0.004
+    samples = _planted_battery_samples(base, per_cpu)
+    labels, count = battery_model.segment_sessions(samples['timestamp'], samples['battery_percentage'],
+                                                   samples['is_charging'])
+    assert count == 4, f"segment_sessions: expected 4 sessions, got {count}"
+    assert labels.tolist() == [0] * 30 + [-1] * 5 + [1] * 30 + [2] * 30 + [3] * 30, "segment_sessions: wrong labels"
+
+    whole = battery_model.summarize_partition(samples)
+    assert len(whole['sessions']) == 4, f"summarize_partition: expected 4 sessions, got {len(whole['sessions'])}"
+    for minutes, drain, mean_cpu in whole['sessions']:
+        assert minutes == 29 and math.isclose(drain, base + per_cpu * mean_cpu, rel_tol=0.05), \
+            f"summarize_partition: unexpected session {(minutes, drain, mean_cpu)}"
+    _, model = battery_model.fit_drain_model(whole['sessions'], whole['load_sums'])
+    assert math.isclose(model['base_per_minute'], base, abs_tol=1e-9), f"fit_drain_model: base {model['base_per_minute']}"
+    assert math.isclose(model['per_cpu_percent_per_minute'], per_cpu, abs_tol=1e-9), \
+        f"fit_drain_model: per-CPU drain {model['per_cpu_percent_per_minute']}"
+
+    # The same history as two partitions, cut in the middle of the second session
+    cut = 50
+    halves = [{field: values[:cut] for field, values in samples.items()},
+              {field: values[cut:] for field, values in samples.items()}]
+    work = [[31.0, 47.5, 12.25], [60.0, 80.5]]
+    partials = [{'work': (len(values), sum(values), sum(v * v for v in values)), 'off': (0, 0.0, 0.0),
+                 'battery': battery_model.summarize_partition(half)} for values, half in zip(work, halves)]
+    merged = merge_partials(partials)
+    everything = work[0] + work[1]
+    count, mean, std = merged['work']
+    assert count == 5 and math.isclose(mean, statistics.mean(everything)) and \
+        math.isclose(std, statistics.stdev(everything)), f"merge_partials: CPU statistics {merged['work']}"
+    assert merged['off'] == (0, None, None), f"merge_partials: empty statistics {merged['off']}"
+    _, merged_model = merged['drain']
+    assert merged_model['sessions'] == 5, f"merge_partials: expected the cut session fitted as two, got {merged_model['sessions']}"
+    assert math.isclose(merged_model['base_per_minute'], base, abs_tol=1e-9) and \
+        math.isclose(merged_model['per_cpu_percent_per_minute'], per_cpu, abs_tol=1e-9), \
+        f"merge_partials: drain model {merged_model}"
+
+
+def check_trend_forecast():
+    """
+    The trend sums, folded in over two updates, and fit_trend recover planted
+    slopes despite a daily pattern; describe_trends reports exactly the planted trends.
+    """
+    import math
+    import sqlite3
+    import trend_forecast
+    from database_manager import DatabaseManager
+
+    rng = random.Random(7)
+    start = datetime(2026, 3, 1)
+    rows = []
+    for step in range(20 * 96):  # 20 days, every 15 minutes
+        when = start + timedelta(minutes=15 * step)
+        day = step / 96
+        rows.append((when.strftime("%Y-%m-%d %H:%M:%S"),
+                     30 + 20 * (9 <= when.hour < 18) + rng.gauss(0, 5),      # Daily pattern, no trend
+                     50 + 0.3 * day + 10 * (when.hour >= 21) + rng.gauss(0, 1),  # +2.1 points per week
+                     60 + 0.8 * day + rng.gauss(0, 0.1)))                   # Disk fills up 0.8 points per day
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "check.db")
+        db = DatabaseManager(db_path)
+        for batch in (rows[:len(rows) // 2], rows[len(rows) // 2:]):
+            conn = sqlite3.connect(db_path)
+            conn.executemany("INSERT INTO metrics (timestamp, cpu_load, memory_usage, disk_usage, is_charging) "
+                             "VALUES (?, ?, ?, ?, 0)", batch)
+            conn.commit()
+            conn.close()
+            db.update_trend_sums()
+        trend_sums = db.get_trend_sums()
+
+    assert sum(bucket[1] for bucket in trend_sums['disk_usage']) == len(rows), "trend sums: rows counted twice or missed"
+    for metric, planted in [("disk_usage", 0.8), ("memory_usage", 0.3), ("cpu_load", 0.0)]:
+        fit = trend_forecast.fit_trend(trend_sums[metric])
+        assert abs(fit['slope_per_day'] - planted) < max(4 * fit['stderr'], 1e-6), \
+            f"fit_trend: {metric} slope {fit['slope_per_day']:.4f} +/- {fit['stderr']:.4f}, planted {planted}"
+        assert math.isclose(fit['span_days'], 20, abs_tol=0.1), f"fit_trend: span {fit['span_days']}"
+
+    forecasts = trend_forecast.describe_trends(trend_sums, {'disk': {'value': 76.0}}, now=start + timedelta(days=20))
+    expected = ["Disk full in ~30 days (+0.80 pts/day)", "Memory baseline creeping up ~2.1 pts/week over 20 days"]
+    assert forecasts == expected, f"describe_trends: expected {expected}, got {forecasts}"
+
+def run_checks(args):
+    checks = [
+        ("CounterRates reset/hotplug", check_counter_rates),
+        ("Battery sessions, drain model and merge_partials", check_battery_model),
+        ("Trend sums and forecasts", check_trend_forecast),
+    ]
+    for label, check in checks:
+        check()
+        print(f"ok  {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the health monitor.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    analysis = subparsers.add_parser("analysis", help="Profile rebuild over a large synthetic history")
+    analysis.add_argument("--rows", type=int, default=3_000_000)
+    analysis.add_argument("--workers", type=int, default=None)
+    analysis.set_defaults(func=bench_analysis)
+
+    cache = subparsers.add_parser("cache", help="History loads and profile rebuilds with the query cache")
+    cache.add_argument("--rows", type=int, default=500_000)
+    cache.add_argument("--limit", type=int, default=10_000)
+    cache.set_defaults(func=bench_cache)
+
+    memory = subparsers.add_parser("memory", help="Memory of regular vs compact history loads")
+    memory.add_argument("--rows", type=int, default=1_000_000)
+    memory.set_defaults(func=bench_memory)
+
+    latency = subparsers.add_parser("latency", help="Monitor sampling latency and detection delay under load_generator")
+    latency.add_argument("--cores", type=int, default=os.cpu_count())
+    latency.add_argument("--duty", type=float, default=1.0)
+    latency.add_argument("--duration", type=float, default=20)
+    latency.add_argument("--interval", type=float, default=2.0)
+    latency.add_argument("--threshold", type=float, default=50.0)
+    latency.set_defaults(func=bench_latency)
+
+    startup = subparsers.add_parser("startup", help="Startup time and peak RSS of the headless mode vs the GUI's imports")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    fleet = subparsers.add_parser("fleet", help="Fleet collector ingest throughput with simulated agents")
+    fleet.add_argument("--agents", type=int, default=300)
+    fleet.add_argument("--batches", type=int, default=20)
+    fleet.add_argument("--batch-size", type=int, default=10)
+    fleet.set_defaults(func=bench_fleet)
+
+    check = subparsers.add_parser("check", help="Deterministic correctness checks of the pure aggregation functions")
+    check.set_defaults(func=run_checks)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
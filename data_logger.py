@@ -1,61 +1,127 @@
 import psutil
 import time
 from datetime import datetime
-from database_manager import DatabaseManager
+from database_manager import get_database_manager
+from adaptive_scheduler import AdaptiveScheduler
+from anomaly_detector import AnomalyDetector, load_user_profile
+from system_monitor import IGNORED_PROCESSES, IoRateMonitor, io_metrics_from_rates
+from fleet_collector import FleetClient
+from shared_snapshot import SnapshotWriter, PUBLISH_INTERVAL
 
 # --- Configuration ---
-LOG_INTERVAL = 60  # seconds between each log entry
+LOG_INTERVAL = 60  # base seconds between each log entry (adapted at runtime)
 CSV_FILENAME = "system_log.csv" # Kept for migration purpose
-
-def get_top_process():
+TOP_K = 5  # processes recorded per entry, by CPU and by memory
+FLEET_COLLECTOR = None  # e.g. ("127.0.0.1", 8765) to also ship entries to a fleet_collector.py
+FLEET_BATCH_SIZE = 10   # entries sent to the collector per request
+PUBLISH_SNAPSHOTS = True  # share live samples with the dashboard through shared memory (see shared_snapshot.py)
+# Rates that cover the time since the previous sample; a log entry gets their average over its interval
+AVERAGED_FIELDS = ["cpu_load", "disk_read_bps", "disk_write_bps", "disk_iops", "disk_await_ms", "net_sent_bps", "net_recv_bps"]
+
+def get_top_processes(count=TOP_K):
     """
-    Iterates through all running processes to find the one using the most CPU.
-    Returns the process name and its CPU usage.
+    Scans the process table once and returns two lists of (name, percent):
+    the top 'count' processes by CPU usage and by memory usage.
+    psutil keeps the Process objects between scans, so each CPU value covers
+    the time since the previous scan (call once at startup to prime it).
     """
     try:
-        # Get a list of all processes with their CPU usage and name
-        # Optimization: Use iterator properly to avoid overhead
-        processes = [p.info for p in psutil.process_iter(['name', 'cpu_percent'])]
-        
-        if not processes:
-            return "N/A", 0.0
+        processes = [p.info for p in psutil.process_iter(['name', 'cpu_percent', 'memory_percent'])]
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return [], []
+
+    # Skip placeholders and entries whose values could not be read
+    processes = [p for p in processes if p['name'] and p['name'] not in IGNORED_PROCESSES]
 
-        # Sort the list by CPU usage in descending order
-        top_process = sorted(
-            processes, key=lambda p: p['cpu_percent'], reverse=True)[0]
+    by_cpu = sorted(processes, key=lambda p: p['cpu_percent'] or 0.0, reverse=True)[:count]
+    by_memory = sorted(processes, key=lambda p: p['memory_percent'] or 0.0, reverse=True)[:count]
 
-        # Return the name and CPU usage of the top process
-        return top_process['name'], top_process['cpu_percent']
-    except (psutil.NoSuchProcess, psutil.AccessDenied, IndexError):
-        # Handle cases where process list is empty or inaccessible
-        return "N/A", 0.0
+    top_cpu = [(p['name'], p['cpu_percent'] or 0.0) for p in by_cpu]
+    top_memory = [(p['name'], p['memory_percent'] or 0.0) for p in by_memory]
+    return top_cpu, top_memory
 
 
-def log_system_metrics():
+def log_system_metrics(scan_processes=True, io_monitor=None):
     """
     Gathers all required system metrics and returns them as a dictionary.
+    When 'scan_processes' is False the (expensive) process-table scan is
+    skipped and the top process fields are left empty.
+    With an IoRateMonitor, disk and network rates since its previous sample are included.
     """
     # Get battery info, handling systems with no battery
     battery = psutil.sensors_battery()
     battery_percentage = battery.percent if battery else "N/A"
     is_charging = battery.power_plugged if battery else False
 
-    # Get the top process
-    top_proc_name, top_proc_cpu = get_top_process()
+    # Get the top processes
+    if scan_processes:
+        top_cpu, top_memory = get_top_processes()
+    else:
+        top_cpu, top_memory = [], []
+    top_proc_name, top_proc_cpu = top_cpu[0] if top_cpu else (None, None)
 
     # Package all data into a dictionary
     metrics = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "cpu_load": psutil.cpu_percent(interval=1),
+        # Non-blocking: the load is measured over the time since the previous entry
+        "cpu_load": psutil.cpu_percent(interval=None),
         "memory_usage": psutil.virtual_memory().percent,
+        "disk_usage": psutil.disk_usage('/').percent,  # Same volume as the dashboard's disk gauge
         "battery_percentage": battery_percentage,
         "is_charging": is_charging,
         "top_process_name": top_proc_name,
         "top_process_cpu": top_proc_cpu,
+        "top_cpu_processes": top_cpu,
+        "top_memory_processes": top_memory,
     }
+    if io_monitor:
+        metrics.update(io_monitor.sample())
     return metrics
 
 
+def live_metrics(sample):
+    """Turns a log_system_metrics() sample into the SystemMonitor.get_all_metrics() form readers expect."""
+    has_battery = sample['battery_percentage'] != "N/A"
+    return {
+        "cpu": {'value': sample['cpu_load']},
+        "memory": {'value': sample['memory_usage']},
+        "disk": {'value': sample['disk_usage']},
+        "battery": {'value': sample['battery_percentage'], 'charging': sample['is_charging']} if has_battery else None,
+        **io_metrics_from_rates({field: sample.get(field) for field in AVERAGED_FIELDS[1:]}),
+    }
+
+
+class EntryWindow:
+    """
+    Combines the samples taken between two log entries while live samples are
+    being published. CPU load and the I/O rates each cover the time since the
+    previous sample, so their time-weighted averages are the values one sample
+    at the entry would have measured (the disk latency is weighted by requests).
+    """
+    def __init__(self):
+        self.sums = {}
+        self.weights = {}
+
+    def add(self, sample, elapsed):
+        for field in AVERAGED_FIELDS:
+            value = sample.get(field)
+            if value is None:
+                continue
+            weight = elapsed * sample['disk_iops'] if field == "disk_await_ms" else elapsed
+            self.sums[field] = self.sums.get(field, 0.0) + value * weight
+            self.weights[field] = self.weights.get(field, 0.0) + weight
+
+    def combine(self, sample):
+        """Returns 'sample' (the newest) with the averaged fields over the whole window, and starts a new window."""
+        entry = dict(sample)
+        for field, weight in self.weights.items():
+            if weight > 0:
+                entry[field] = self.sums[field] / weight
+        entry['cpu_load'] = round(entry['cpu_load'], 1)
+        self.sums, self.weights = {}, {}
+        return entry
+
+
 def main():
     """
     Main loop to log data at a set interval.
@@ -64,33 +130,89 @@ def main():
     print("--- System Data Logger (Database Edition) ---")
     
     # Initialize Database Manager
-    db = DatabaseManager()
+    db = get_database_manager()
     
     # Attempt migration if legacy CSV exists
     migrated_count = db.migrate_from_csv(CSV_FILENAME)
     if migrated_count > 0:
         print(f"Successfully migrated {migrated_count} records from old CSV to Database.")
-
-    print(f"Logging data every {LOG_INTERVAL} seconds to SQLite DB.")
+    # Brings the trend sums up to date (the whole history the first time); the dashboard only reads them
+    db.update_trend_sums()
+
+    scheduler = AdaptiveScheduler(LOG_INTERVAL)
+    # Paces the extra samples taken for the dashboard between log entries
+    live_scheduler = AdaptiveScheduler(PUBLISH_INTERVAL)
+    # Anomalies switch the scheduler to its fastest schedule, as in the dashboard
+    anomaly_detector = AnomalyDetector(load_user_profile())
+    fleet_client = FleetClient(FLEET_COLLECTOR, FLEET_BATCH_SIZE) if FLEET_COLLECTOR else None
+    # Prime the CPU and I/O counters so the first entry is meaningful
+    psutil.cpu_percent(interval=None)
+    get_top_processes()
+    io_monitor = IoRateMonitor()
+    io_monitor.sample()
+
+    writer = None
+    if PUBLISH_SNAPSHOTS:
+        try:
+            writer = SnapshotWriter()
+            print(f"Sharing live samples (every ~{PUBLISH_INTERVAL} seconds) while a dashboard is open.")
+        except (RuntimeError, OSError) as e:
+            print(f"Live samples will not be shared: {e}")
+
+    print(f"Logging data every ~{LOG_INTERVAL} seconds to SQLite DB.")
     print("Press Ctrl+C to stop.")
 
+    window = EntryWindow()
+    last_sample = time.monotonic()
+    # The first entry measures a full interval too, not just the few milliseconds since priming
+    next_entry = last_sample + scheduler.next_interval()
     try:
         while True:
-            # Get the latest metrics
-            current_metrics = log_system_metrics()
-
-            # Insert into DB
-            db.insert_metric(current_metrics)
-
-            print(f"[{current_metrics['timestamp']}] Log entry saved. CPU: {current_metrics['cpu_load']}% | Top Process: {current_metrics['top_process_name']}")
-
-            # Wait for the next interval
-            time.sleep(LOG_INTERVAL)
+            now = time.monotonic()
+            entry_due = now >= next_entry
+            # Checking the heartbeat is a memory read; nothing is sampled unless someone is reading
+            publishing = writer is not None and writer.reader_attached()
+
+            if entry_due or publishing:
+                tick_scheduler = scheduler if entry_due else live_scheduler
+                tick_scheduler.begin_tick()
+                scan_processes = entry_due and scheduler.should_scan_processes()
+
+                # One sample serves both the dashboard and the log entry
+                sample = log_system_metrics(scan_processes, io_monitor)
+                window.add(sample, now - last_sample)
+                last_sample = now
+                if publishing:
+                    writer.publish(live_metrics(sample))
+
+                if entry_due:
+                    current_metrics = window.combine(sample)
+                    db.insert_metric(current_metrics)
+                    if fleet_client:
+                        fleet_client.add(current_metrics)
+                    if anomaly_detector.check(live_metrics(current_metrics)):
+                        scheduler.report_anomaly()
+
+                tick_scheduler.end_tick(system_cpu=sample['cpu_load'], scanned=scan_processes)
+
+                if entry_due:
+                    next_entry = now + scheduler.next_interval()
+                    top_process = current_metrics['top_process_name'] or "(scan skipped)"
+                    print(f"[{current_metrics['timestamp']}] Log entry saved. CPU: {current_metrics['cpu_load']}% | Top Process: {top_process}")
+
+            # Wake for the next entry, or earlier to publish (or to look for a reader)
+            time.sleep(max(min(next_entry, now + live_scheduler.next_interval()) - time.monotonic(), 0))
 
     except KeyboardInterrupt:
         print("\nLogger stopped by user. Data saved.")
     except Exception as e:
         print(f"An error occurred: {e}")
+    finally:
+        if writer:
+            writer.close()
+        if fleet_client:
+            fleet_client.flush()
+            fleet_client.close()
 
 
 if __name__ == "__main__":
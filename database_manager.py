@@ -1,21 +1,129 @@
 import sqlite3
+import threading
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime
 import os
 
 DB_FILENAME = "health_data.db"
+CACHE_SIZE = 256  # Query results kept per DatabaseManager (least recently used are evicted)
+
+# Values stored in top_processes.kind
+PROCESS_KIND_CPU = 0
+PROCESS_KIND_MEMORY = 1
+PROCESS_KINDS = {'cpu': PROCESS_KIND_CPU, 'memory': PROCESS_KIND_MEMORY}
+
+BATTERY_UNKNOWN = 255  # battery_percentage in compact loads when there is no reading
+SCHEMA_VERSION = 1  # PRAGMA user_version once the one-time upgrade steps in _init_db have run
+
+# I/O rate columns added to metrics after the original schema (all REAL)
+IO_RATE_COLUMNS = ["disk_read_bps", "disk_write_bps", "disk_iops", "disk_await_ms", "net_sent_bps", "net_recv_bps"]
+
+# Metrics with running regression sums in trend_sums (see update_trend_sums)
+TREND_METRICS = ["cpu_load", "memory_usage", "disk_usage"]
+TREND_EPOCH = "2020-01-01 00:00:00"  # t in the trend sums is days since this time, keeping the sums well-conditioned
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_database_manager(db_path=DB_FILENAME):
+    """
+    Returns the process-wide DatabaseManager for 'db_path', creating it on
+    first use. Sharing it means the schema is only set up once per process
+    and every window and analysis run uses the same query cache.
+    """
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = DatabaseManager(db_path)
+            _managers[db_path] = manager
+        return manager
 
 class DatabaseManager:
     """
     Handles all interactions with the SQLite database.
+
+    Read results are kept in an LRU cache. Entries are checked against a
+    watermark: PRAGMA data_version (which changes whenever any connection
+    commits) and the highest metrics id. Since metrics are only appended,
+    a changed watermark usually just means newer rows, which are fetched
+    and appended instead of re-running the whole query.
+    Cached DataFrames are shared between callers and must not be modified in place.
     """
     def __init__(self, db_path=DB_FILENAME):
         self.db_path = db_path
+        self._process_name_ids = {}  # name -> id cache for the process_names lookup table
+        self._cache = OrderedDict()
+        self._cache_lock = threading.RLock()
+        self._watch_conn = None  # Long-lived connection used only to read PRAGMA data_version
         self._init_db()
 
     def _get_connection(self):
         return sqlite3.connect(self.db_path)
 
+    # --- Query cache ---
+    def _data_version(self):
+        if self._watch_conn is None:
+            self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._watch_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _max_metric_id(self, conn):
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM metrics').fetchone()[0]
+
+    def get_watermark(self):
+        """Returns the current (data_version, max metrics id) watermark."""
+        with self._cache_lock:
+            conn = self._get_connection()
+            watermark = (self._data_version(), self._max_metric_id(conn))
+            conn.close()
+            return watermark
+
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key, value, watermark):
+        self._cache[key] = {'value': value, 'version': watermark[0], 'max_id': watermark[1]}
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get_range_cache(self, key, end):
+        """
+        Returns the cached value for a query over rows with timestamps before
+        'end', or None. The value stays valid as long as every row added since
+        it was cached has a timestamp at or after 'end'.
+        """
+        with self._cache_lock:
+            entry = self._cache_get(key)
+            if entry is None:
+                return None
+            version = self._data_version()
+            if entry['version'] == version:
+                return entry['value']
+
+            conn = self._get_connection()
+            first_new = conn.execute(
+                'SELECT MIN(timestamp) FROM metrics WHERE id > ?', (entry['max_id'],)).fetchone()[0]
+            max_id = self._max_metric_id(conn)
+            conn.close()
+            if max_id < entry['max_id'] or (first_new is not None and first_new < end):
+                del self._cache[key]
+                return None
+            entry['version'], entry['max_id'] = version, max_id
+            return entry['value']
+
+    def put_range_cache(self, key, value, watermark):
+        """Caches 'value', computed from data no newer than 'watermark' (see get_watermark)."""
+        with self._cache_lock:
+            self._cache_put(key, value, watermark)
+
     def _init_db(self):
         """Creates the necessary tables if they don't exist."""
         conn = self._get_connection()
@@ -35,7 +143,61 @@ class DatabaseManager:
             )
         ''')
         
-        # Events table - stores alerts and app lifecycle events (for future use)
+        # Add columns introduced after the table was first created
+        cursor.execute('PRAGMA table_info(metrics)')
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column in IO_RATE_COLUMNS + ['disk_usage']:
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE metrics ADD COLUMN {column} REAL')
+
+        # Lets time-range queries find the matching metric ids without a full scan
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics (timestamp)')
+
+        # Process names are interned once and referenced by id from top_processes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS process_names (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+        # Top-K processes per metrics row, by CPU (kind 0) and memory (kind 1).
+        # Values are stored as integer permille (0.1% steps) to keep rows small.
+        # The primary key clusters rows by metric_id, so a time range maps to one range scan.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS top_processes (
+                metric_id INTEGER NOT NULL,
+                kind INTEGER NOT NULL,
+                rank INTEGER NOT NULL,
+                name_id INTEGER NOT NULL,
+                value_permille INTEGER NOT NULL,
+                PRIMARY KEY (metric_id, kind, rank)
+            ) WITHOUT ROWID
+        ''')
+
+        # Running regression sums per metric and hour of day (0-23), over t = days since TREND_EPOCH.
+        # trend_progress records the last metrics id folded in, so updates only ever read new rows.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trend_sums (
+                metric TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                n INTEGER NOT NULL,
+                sum_t REAL NOT NULL,
+                sum_tt REAL NOT NULL,
+                sum_y REAL NOT NULL,
+                sum_ty REAL NOT NULL,
+                sum_yy REAL NOT NULL,
+                PRIMARY KEY (metric, hour)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trend_progress (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                last_metric_id INTEGER NOT NULL
+            )
+        ''')
+
+        # Events table - stores alerts and app lifecycle events (written by EventJournal)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS events (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,55 +206,428 @@ class DatabaseManager:
                 message TEXT
             )
         ''')
+        # Secondary indexes carry the rowid, so these also serve keyset paging by id
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)')
+
+        cursor.execute('PRAGMA user_version')
+        if cursor.fetchone()[0] < SCHEMA_VERSION:
+            # Rows logged before names were interned only carry the name on the metrics row
+            self._intern_legacy_names(cursor)
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
         
         conn.commit()
         conn.close()
 
+    def _intern_legacy_names(self, cursor):
+        """Adds every process name stored directly on metrics rows to process_names."""
+        cursor.execute('''
+            INSERT OR IGNORE INTO process_names (name)
+            SELECT DISTINCT top_process_name FROM metrics WHERE top_process_name IS NOT NULL
+        ''')
+
+    def _get_process_name_id(self, cursor, name):
+        """Returns the id of 'name' in process_names, adding it if needed."""
+        name_id = self._process_name_ids.get(name)
+        if name_id is None:
+            cursor.execute('INSERT OR IGNORE INTO process_names (name) VALUES (?)', (name,))
+            cursor.execute('SELECT id FROM process_names WHERE name = ?', (name,))
+            name_id = cursor.fetchone()[0]
+            self._process_name_ids[name] = name_id
+        return name_id
+
     def insert_metric(self, data):
         """
         Inserts a single metric record.
-        data: dict containing keys matching the CSV header.
+        data: dict containing keys matching the CSV header, plus optional
+        'top_cpu_processes' / 'top_memory_processes' lists of (name, percent).
+        When the top-K lists are given, the top process name is only stored
+        (interned) in top_processes instead of being repeated on every row.
+        Returns the id of the new metrics row.
         """
         conn = self._get_connection()
         cursor = conn.cursor()
+
+        top_lists = {
+            PROCESS_KIND_CPU: data.get('top_cpu_processes'),
+            PROCESS_KIND_MEMORY: data.get('top_memory_processes'),
+        }
+        has_top_k = any(top_lists.values())
+        if not has_top_k and data.get('top_process_name'):
+            # Kept on the metrics row, but interned too so get_history_compact can resolve it
+            self._get_process_name_id(cursor, data['top_process_name'])
         
-        cursor.execute('''
-            INSERT INTO metrics (timestamp, cpu_load, memory_usage, battery_percentage, is_charging, top_process_name, top_process_cpu)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+        cursor.execute(f'''
+            INSERT INTO metrics (timestamp, cpu_load, memory_usage, battery_percentage, is_charging, top_process_name, top_process_cpu,
+                                 disk_usage, {', '.join(IO_RATE_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, {', '.join('?' * len(IO_RATE_COLUMNS))})
         ''', (
             data.get('timestamp'),
             data.get('cpu_load'),
             data.get('memory_usage'),
             data.get('battery_percentage') if data.get('battery_percentage') != "N/A" else None,
             1 if data.get('is_charging') == True else 0, # Convert bool to int
-            data.get('top_process_name'),
-            data.get('top_process_cpu')
+            None if has_top_k else data.get('top_process_name'),
+            data.get('top_process_cpu'),
+            data.get('disk_usage'),
+            *(data.get(column) for column in IO_RATE_COLUMNS)
         ))
-        
+        metric_id = cursor.lastrowid
+
+        rows = []
+        for kind, processes in top_lists.items():
+            for rank, (name, value) in enumerate(processes or []):
+                name_id = self._get_process_name_id(cursor, name)
+                rows.append((metric_id, kind, rank, name_id, int(round((value or 0) * 10))))
+        if rows:
+            cursor.executemany('''
+                INSERT INTO top_processes (metric_id, kind, rank, name_id, value_permille)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+
+        # Normally just this row; also catches up on rows added by other means (e.g. CSV migration)
+        self._update_trend_sums(cursor)
+        conn.commit()
+        conn.close()
+        return metric_id
+
+    def _update_trend_sums(self, cursor):
+        """
+        Folds the metrics rows added since the last update into trend_sums.
+        Must run inside a write transaction, so concurrent updates cannot count a row twice.
+        """
+        cursor.execute('SELECT last_metric_id FROM trend_progress WHERE id = 0')
+        row = cursor.fetchone()
+        last_id = row[0] if row else 0
+        max_id = self._max_metric_id(cursor.connection)
+        if max_id <= last_id:
+            return
+        for column in TREND_METRICS:
+            cursor.execute(f'''
+                INSERT INTO trend_sums (metric, hour, n, sum_t, sum_tt, sum_y, sum_ty, sum_yy)
+                SELECT ?, hour, COUNT(*), TOTAL(t), TOTAL(t * t), TOTAL(y), TOTAL(t * y), TOTAL(y * y)
+                FROM (
+                    SELECT CAST(strftime('%H', timestamp) AS INTEGER) AS hour,
+                           julianday(timestamp) - julianday('{TREND_EPOCH}') AS t, {column} AS y
+                    FROM metrics
+                    WHERE id > ? AND id <= ? AND {column} IS NOT NULL
+                )
+                WHERE t IS NOT NULL
+                GROUP BY hour
+                ON CONFLICT (metric, hour) DO UPDATE SET
+                    n = n + excluded.n, sum_t = sum_t + excluded.sum_t, sum_tt = sum_tt + excluded.sum_tt,
+                    sum_y = sum_y + excluded.sum_y, sum_ty = sum_ty + excluded.sum_ty, sum_yy = sum_yy + excluded.sum_yy
+            ''', (column, last_id, max_id))
+        cursor.execute('INSERT OR REPLACE INTO trend_progress (id, last_metric_id) VALUES (0, ?)', (max_id,))
+
+    def update_trend_sums(self):
+        """
+        Folds every metrics row not yet counted into trend_sums (the whole history the
+        first time). insert_metric already does this for its own row; the data logger
+        calls it at startup to pick up rows added by other means.
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            self._update_trend_sums(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_trend_sums(self):
+        """
+        Returns {metric: [(hour, n, sum_t, sum_tt, sum_y, sum_ty, sum_yy), ...]} for TREND_METRICS,
+        with t in days since TREND_EPOCH. Read-only: it returns the sums as of the last
+        update, so it never writes or rescans history.
+        """
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                'SELECT metric, hour, n, sum_t, sum_tt, sum_y, sum_ty, sum_yy FROM trend_sums ORDER BY metric, hour').fetchall()
+        finally:
+            conn.close()
+        sums = {metric: [] for metric in TREND_METRICS}
+        for metric, *bucket in rows:
+            sums.setdefault(metric, []).append(tuple(bucket))
+        return sums
+
+    def insert_events(self, events):
+        """
+        Inserts a batch of events in a single transaction.
+        events: iterable of (timestamp, event_type, message) tuples.
+        """
+        conn = self._get_connection()
+        conn.executemany('INSERT INTO events (timestamp, event_type, message) VALUES (?, ?, ?)', events)
         conn.commit()
         conn.close()
 
+    def get_events(self, event_type=None, before_id=None, after_id=None, limit=50):
+        """
+        Returns one page of events, newest first, as a list of
+        (id, timestamp, event_type, message) tuples.
+        Paging is keyset-based: pass the smallest id of the current page as
+        'before_id' for the next (older) page, or the largest id as 'after_id'
+        for the previous (newer) page. Cost stays constant however deep the page.
+        """
+        conditions, params = [], []
+        if event_type is not None:
+            conditions.append('event_type = ?')
+            params.append(event_type)
+        if before_id is not None:
+            conditions.append('id < ?')
+            params.append(before_id)
+        if after_id is not None:
+            conditions.append('id > ?')
+            params.append(after_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # Walking forward from 'after_id' needs ascending order; the page is flipped afterwards
+        order = 'ASC' if after_id is not None else 'DESC'
+
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT id, timestamp, event_type, message FROM events {where} ORDER BY id {order} LIMIT ?',
+                (*params, limit))
+            rows = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"Error fetching events: {e}")
+            return []
+
+        if after_id is not None:
+            rows.reverse()
+        return rows
+
+    def _read_history(self, conn, limit, up_to_id, after_id=0):
+        """Reads the newest 'limit' metrics rows with after_id < id <= up_to_id, in id order."""
+        # The top process name comes from the interned top-K table for newer rows
+        query = f'''
+            SELECT m.id, m.timestamp, m.cpu_load, m.memory_usage, m.battery_percentage, m.is_charging,
+                   COALESCE(m.top_process_name, pn.name) AS top_process_name, m.top_process_cpu,
+                   {', '.join('m.' + column for column in IO_RATE_COLUMNS)}
+            FROM metrics m
+            LEFT JOIN top_processes tp ON tp.metric_id = m.id AND tp.kind = {PROCESS_KIND_CPU} AND tp.rank = 0
+            LEFT JOIN process_names pn ON pn.id = tp.name_id
+            WHERE m.id > ? AND m.id <= ?
+            ORDER BY m.id DESC LIMIT ?
+        '''
+        # Fixed dtypes, so appended chunks always match the cached frame
+        dtypes = {'cpu_load': 'float64', 'memory_usage': 'float64', 'battery_percentage': 'float64', 'top_process_cpu': 'float64',
+                  **{column: 'float64' for column in IO_RATE_COLUMNS}}
+        df = pd.read_sql_query(query, conn, params=(after_id, up_to_id, limit), dtype=dtypes)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.iloc[::-1]
+
     def get_recent_history(self, limit=1000):
         """
         Returns the last 'limit' records as a pandas DataFrame.
-        Used by the GraphWindow.
+        Used by the GraphWindow. Served from the query cache when nothing was
+        logged since the last call; otherwise only the new rows are read.
+        """
+        key = ('recent_history', limit)
+        try:
+            with self._cache_lock:
+                version = self._data_version()
+                entry = self._cache_get(key)
+                if entry is not None and entry['version'] == version:
+                    return entry['value']
+
+                conn = self._get_connection()
+                max_id = self._max_metric_id(conn)
+                if entry is not None and entry['max_id'] == max_id:
+                    # Something else changed (e.g. the events table): the rows are still current
+                    conn.close()
+                    entry['version'] = version
+                    return entry['value']
+
+                if entry is not None and entry['max_id'] < max_id:
+                    new_rows = self._read_history(conn, limit, max_id, after_id=entry['max_id'])
+                    df = pd.concat([entry['value'].sort_values(by='id'), new_rows]).tail(limit)
+                else:
+                    df = self._read_history(conn, limit, max_id)
+                conn.close()
+
+                # Sort by timestamp ascending for the graph
+                df = df.sort_values(by='timestamp', kind='stable').reset_index(drop=True)
+                self._cache_put(key, df, (version, max_id))
+                return df
+        except Exception as e:
+            print(f"Error fetching history: {e}")
+            return pd.DataFrame()
+
+    def get_history_compact(self, limit=None):
+        """
+        Returns the last 'limit' records (all if None) as a compact DataFrame:
+          timestamp           int64   seconds since the epoch of the logged wall-clock time
+                                      (pd.to_datetime(..., unit='s') gives the usual timestamps back)
+          cpu_load, memory_usage, top_process_cpu and the I/O rate columns   float32 (NaN when missing)
+          battery_percentage  uint8   (BATTERY_UNKNOWN when there is no battery reading)
+          is_charging         uint8
+          top_process_name    category, built from the interned process_names table
+        Rows are converted by SQLite and streamed from the cursor straight into
+        one numpy record array, so no per-row Python objects are kept around.
+        """
+        import numpy as np
+
+        query = f'''
+            SELECT m.id,
+                   CAST(strftime('%s', m.timestamp) AS INTEGER),
+                   COALESCE(m.cpu_load, -1.0),
+                   COALESCE(m.memory_usage, -1.0),
+                   COALESCE(m.battery_percentage, {BATTERY_UNKNOWN}),
+                   COALESCE(m.is_charging, 0),
+                   COALESCE(tp.name_id, pn.id, -1),
+                   COALESCE(m.top_process_cpu, -1.0),
+                   {', '.join(f'COALESCE(m.{column}, -1.0)' for column in IO_RATE_COLUMNS)}
+            FROM metrics m
+            LEFT JOIN top_processes tp ON tp.metric_id = m.id AND tp.kind = {PROCESS_KIND_CPU} AND tp.rank = 0
+            LEFT JOIN process_names pn ON pn.name = m.top_process_name
+        '''
+        if limit is not None:
+            query = f'SELECT * FROM ({query} ORDER BY m.id DESC LIMIT {int(limit)}) ORDER BY 1'
+        else:
+            query += ' ORDER BY m.id'
+
+        record = np.dtype([
+            ('id', np.int64), ('timestamp', np.int64), ('cpu_load', np.float32), ('memory_usage', np.float32),
+            ('battery_percentage', np.uint8), ('is_charging', np.uint8), ('name_id', np.int32),
+            ('top_process_cpu', np.float32), *((column, np.float32) for column in IO_RATE_COLUMNS),
+        ])
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, name FROM process_names ORDER BY id')
+        names = cursor.fetchall()
+        cursor.execute(query)
+        records = np.fromiter(cursor, dtype=record)
+        conn.close()
+
+        # Map name ids to category codes (ids are not guaranteed to be contiguous)
+        categories = [name for _, name in names]
+        code_of = np.full((names[-1][0] if names else 0) + 2, -1, dtype=np.int32)
+        if names:
+            code_of[[name_id for name_id, _ in names]] = np.arange(len(names), dtype=np.int32)
+        codes = code_of[records['name_id']]  # -1 (missing) indexes the trailing -1 slot
+
+        columns = {}
+        for field in ('id', 'timestamp', 'cpu_load', 'memory_usage', 'battery_percentage', 'is_charging', 'top_process_cpu',
+                      *IO_RATE_COLUMNS):
+            column = np.ascontiguousarray(records[field])
+            if column.dtype == np.float32:
+                column[column < 0] = np.nan
+            columns[field] = column
+        columns['top_process_name'] = pd.Categorical.from_codes(codes, categories=categories)
+        del records
+
+        return pd.DataFrame(columns, copy=False)
+
+    def get_dominant_processes(self, start, end, kind='cpu', limit=10):
+        """
+        Returns the processes that accounted for the most load in the top-K between
+        'start' and 'end' (timestamp strings, inclusive) as a DataFrame with
+        columns name, samples, avg_percent and peak_percent.
+        kind: 'cpu' or 'memory'.
         """
         try:
             conn = self._get_connection()
-            query = f"SELECT * FROM metrics ORDER BY id DESC LIMIT {limit}"
-            df = pd.read_sql_query(query, conn)
+            cursor = conn.cursor()
+            # Resolve the time range to a metric id range via idx_metrics_timestamp
+            cursor.execute('SELECT MIN(id), MAX(id) FROM metrics WHERE timestamp BETWEEN ? AND ?', (start, end))
+            first_id, last_id = cursor.fetchone()
+            if first_id is None:
+                conn.close()
+                return pd.DataFrame(columns=['name', 'samples', 'avg_percent', 'peak_percent'])
+
+            query = '''
+                SELECT pn.name AS name,
+                       COUNT(*) AS samples,
+                       AVG(tp.value_permille) / 10.0 AS avg_percent,
+                       MAX(tp.value_permille) / 10.0 AS peak_percent
+                FROM top_processes tp
+                JOIN process_names pn ON pn.id = tp.name_id
+                WHERE tp.metric_id BETWEEN ? AND ? AND tp.kind = ?
+                GROUP BY tp.name_id
+                ORDER BY SUM(tp.value_permille) DESC
+                LIMIT ?
+            '''
+            df = pd.read_sql_query(query, conn, params=(first_id, last_id, PROCESS_KINDS[kind], limit))
             conn.close()
-            
-            # Sort by timestamp ascending for the graph
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df = df.sort_values(by='timestamp')
-                
             return df
         except Exception as e:
-            print(f"Error fetching history: {e}")
+            print(f"Error fetching dominant processes: {e}")
             return pd.DataFrame()
 
+    def get_time_bounds(self):
+        """Returns the (first, last) timestamp strings in the metrics table, or (None, None)."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        # Separate queries so SQLite can answer each from the end of idx_metrics_timestamp
+        cursor.execute('SELECT MIN(timestamp) FROM metrics')
+        first = cursor.fetchone()[0]
+        cursor.execute('SELECT MAX(timestamp) FROM metrics')
+        bounds = (first, cursor.fetchone()[0])
+        conn.close()
+        return bounds
+
+    def get_partition_aggregates(self, start, end, work_days, work_start_hour, work_end_hour):
+        """
+        Computes mergeable partial aggregates for rows with start <= timestamp < end,
+        entirely inside SQLite:
+          'work' / 'off': (count, sum, sum of squares) of cpu_load for work and off hours
+        work_days uses Monday=0 ... Sunday=6.
+        """
+        days = ', '.join(str(int(d)) for d in work_days)
+        # strftime('%w') counts from Sunday=0; shift it to Monday=0
+        is_work = f'''(((CAST(strftime('%w', timestamp) AS INTEGER) + 6) % 7) IN ({days})
+                      AND CAST(strftime('%H', timestamp) AS INTEGER) >= {int(work_start_hour)}
+                      AND CAST(strftime('%H', timestamp) AS INTEGER) < {int(work_end_hour)})'''
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        result = {'work': (0, 0.0, 0.0), 'off': (0, 0.0, 0.0)}
+
+        cursor.execute(f'''
+            SELECT {is_work} AS is_work, COUNT(cpu_load), TOTAL(cpu_load), TOTAL(cpu_load * cpu_load)
+            FROM metrics
+            WHERE timestamp >= ? AND timestamp < ?
+            GROUP BY is_work
+        ''', (start, end))
+        for is_work_group, count, total, total_sq in cursor.fetchall():
+            result['work' if is_work_group else 'off'] = (count, total, total_sq)
+
+        conn.close()
+        return result
+
+    def get_battery_samples(self, start, end):
+        """
+        Returns the rows with start <= timestamp < end, in time order, as numpy arrays
+        for the battery drain analysis:
+          'timestamp'           int64    seconds since the epoch of the logged wall-clock time
+          'battery_percentage'  float64  NaN when there is no battery reading
+          'is_charging'         uint8
+          'cpu_load'            float64  NaN when missing
+        """
+        import numpy as np
+
+        record = np.dtype([('timestamp', np.int64), ('battery_percentage', np.float64),
+                           ('is_charging', np.uint8), ('cpu_load', np.float64)])
+        conn = self._get_connection()
+        cursor = conn.execute('''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER), COALESCE(battery_percentage, -1.0),
+                   COALESCE(is_charging, 0), COALESCE(cpu_load, -1.0)
+            FROM metrics
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+        ''', (start, end))
+        records = np.fromiter(cursor, dtype=record)
+        conn.close()
+
+        samples = {field: np.ascontiguousarray(records[field]) for field in record.names}
+        for field in ('battery_percentage', 'cpu_load'):
+            samples[field][samples[field] < 0] = np.nan
+        return samples
+
     def migrate_from_csv(self, csv_path):
         """
         One-time utility to import data from the old CSV file.
@@ -112,7 +647,10 @@ class DatabaseManager:
             df['is_charging'] = df['is_charging'].apply(lambda x: 1 if str(x).lower() == 'true' else 0)
             
             df.to_sql('metrics', conn, if_exists='append', index=False)
+            self._intern_legacy_names(conn.cursor())
+            conn.commit()
             conn.close()
+            self.clear_cache()  # Imported rows are older than the cached ones
             
             # Rename existing CSV to standard backup name to prevent re-import
             backup_name = f"{csv_path}.bak"
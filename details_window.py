@@ -1,41 +1,161 @@
 import customtkinter as ctk
+from process_snapshot import get_process_snapshot
+
+VISIBLE_ROWS = 14   # Row widgets in the pool; only these are ever created
+POLL_MS = 250       # How often the window checks for a newer process snapshot
+ROW_COLOR = "#3D4460"
+
+# Sort button label -> (tuple index in the snapshot, descending?)
+SORT_OPTIONS = {"CPU": (2, True), "Memory": (3, True), "Name": (1, False)}
 
 class DetailsWindow(ctk.CTkToplevel):
     """
-    A custom pop-up window designed to display a list of items,
-    such as the top 5 running processes.
+    A live, scrollable view of all running processes.
+
+    The process table is read from the shared ProcessSnapshot, which is
+    refreshed in a background thread, so opening the window never blocks the
+    UI. Scrolling is virtualized: a fixed pool of VISIBLE_ROWS row widgets is
+    created once and only their text changes as the view scrolls or refreshes.
     """
-    def __init__(self, title, data_list):
+    def __init__(self, title, sort_by="cpu"):
         super().__init__()
 
         self.title(title)
-        self.geometry("450x350")
-        self.resizable(False, False)
+        self.geometry("520x560")
+        self.resizable(False, True)
         self.attributes("-topmost", True)
 
+        self.snapshot = get_process_snapshot()
+        self.snapshot.acquire()
+        self.seen_version = -1
+        self.rows = []        # Filtered and sorted process tuples
+        self.offset = 0       # Index of the first visible row
+        self.sort_key = {"cpu": "CPU", "memory": "Memory"}.get(sort_by, "CPU")
+        self.poll_job = None
+
         main_frame = ctk.CTkFrame(self, fg_color="transparent")
         main_frame.pack(padx=10, pady=10, expand=True, fill="both")
-        main_frame.grid_columnconfigure(0, weight=1)
 
-        # Create a scrollable frame to hold the list
-        scrollable_frame = ctk.CTkScrollableFrame(main_frame, label_text=title, label_font=("Segoe UI Bold", 16))
-        scrollable_frame.pack(expand=True, fill="both")
+        # --- Controls: substring filter and sort order ---
+        controls = ctk.CTkFrame(main_frame, fg_color="transparent")
+        controls.pack(fill="x", pady=(0, 8))
+        self.filter_var = ctk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.rebuild(reset_offset=True))
+        filter_entry = ctk.CTkEntry(controls, textvariable=self.filter_var, placeholder_text="Filter by name...")
+        filter_entry.pack(side="left", expand=True, fill="x", padx=(0, 10))
+        self.sort_button = ctk.CTkSegmentedButton(controls, values=list(SORT_OPTIONS), command=self.on_sort_changed)
+        self.sort_button.set(self.sort_key)
+        self.sort_button.pack(side="right")
 
-        # Display the data
-        if not data_list:
-            label = ctk.CTkLabel(scrollable_frame, text="No process data available.", font=("Segoe UI", 14))
-            label.pack(pady=10)
-        else:
-            for item_name, item_value in data_list:
-                item_frame = ctk.CTkFrame(scrollable_frame, fg_color="#3D4460")
-                item_frame.pack(fill="x", pady=5, padx=5)
-                
-                name_label = ctk.CTkLabel(item_frame, text=item_name, font=("Segoe UI", 14), anchor="w")
-                name_label.pack(side="left", padx=10, pady=5)
-                
-                value_label = ctk.CTkLabel(item_frame, text=f"{item_value:.1f}%", font=("Segoe UI Bold", 14), anchor="e")
-                value_label.pack(side="right", padx=10, pady=5)
+        # --- Header ---
+        header = ctk.CTkFrame(main_frame, fg_color="transparent")
+        header.pack(fill="x")
+        header.grid_columnconfigure(0, weight=1)
+        for column, text in enumerate(["Process", "CPU", "Memory"]):
+            label = ctk.CTkLabel(header, text=text, font=("Segoe UI Bold", 13), anchor="w" if column == 0 else "e", width=80)
+            label.grid(row=0, column=column, sticky="ew", padx=10)
+
+        # --- Fixed pool of rows plus a scrollbar driving the offset ---
+        table = ctk.CTkFrame(main_frame, fg_color="transparent")
+        table.pack(expand=True, fill="both")
+        table.grid_columnconfigure(0, weight=1)
+        self.scrollbar = ctk.CTkScrollbar(table, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, rowspan=VISIBLE_ROWS, sticky="ns")
+
+        self.row_widgets = []
+        for i in range(VISIBLE_ROWS):
+            row_frame = ctk.CTkFrame(table, fg_color=ROW_COLOR, height=28)
+            row_frame.grid(row=i, column=0, sticky="ew", pady=2)
+            row_frame.grid_columnconfigure(0, weight=1)
+            name_label = ctk.CTkLabel(row_frame, text="", font=("Segoe UI", 13), anchor="w")
+            name_label.grid(row=0, column=0, sticky="ew", padx=10)
+            cpu_label = ctk.CTkLabel(row_frame, text="", font=("Segoe UI Bold", 13), anchor="e", width=80)
+            cpu_label.grid(row=0, column=1, padx=10)
+            mem_label = ctk.CTkLabel(row_frame, text="", font=("Segoe UI Bold", 13), anchor="e", width=80)
+            mem_label.grid(row=0, column=2, padx=10)
+            self.row_widgets.append([row_frame, name_label, cpu_label, mem_label, None])  # Last item: shown text
+            for widget in (row_frame, name_label, cpu_label, mem_label):
+                widget.bind("<MouseWheel>", self.on_mouse_wheel)
+                widget.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+                widget.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+
+        self.status_label = ctk.CTkLabel(main_frame, text="Collecting process data...", font=("Segoe UI", 12), text_color="#AAB1C2")
+        self.status_label.pack(pady=(8, 0))
 
         ok_button = ctk.CTkButton(main_frame, text="Close", command=self.destroy, width=100)
         ok_button.pack(pady=10)
 
+        self.poll()
+
+    def destroy(self):
+        if self.poll_job:
+            self.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.snapshot.release()
+        super().destroy()
+
+    def poll(self):
+        """Picks up a new snapshot, if the background scan has produced one."""
+        if self.snapshot.version != self.seen_version:
+            self.seen_version = self.snapshot.version
+            self.rebuild()
+        self.poll_job = self.after(POLL_MS, self.poll)
+
+    def on_sort_changed(self, value):
+        self.sort_key = value
+        self.rebuild(reset_offset=True)
+
+    def rebuild(self, reset_offset=False):
+        """Re-applies the filter and sort order to the latest snapshot."""
+        processes = self.snapshot.processes
+        text = self.filter_var.get().strip().lower()
+        if text:
+            processes = [p for p in processes if text in p[1].lower()]
+        index, descending = SORT_OPTIONS[self.sort_key]
+        if index == 1:
+            self.rows = sorted(processes, key=lambda p: p[1].lower())
+        else:
+            self.rows = sorted(processes, key=lambda p: p[index], reverse=descending)
+
+        if self.snapshot.timestamp is not None:
+            self.status_label.configure(text=f"{len(self.rows)} of {len(self.snapshot.processes)} processes")
+        self.scroll_to(0 if reset_offset else self.offset)
+
+    def scroll_to(self, offset):
+        max_offset = max(len(self.rows) - VISIBLE_ROWS, 0)
+        self.offset = min(max(int(offset), 0), max_offset)
+        self.render()
+
+    def render(self):
+        """Writes the visible slice into the row pool, touching only rows whose text changed."""
+        visible = self.rows[self.offset:self.offset + VISIBLE_ROWS]
+        for i, widgets in enumerate(self.row_widgets):
+            row_frame, name_label, cpu_label, mem_label, shown = widgets
+            if i < len(visible):
+                _, name, cpu, mem = visible[i]
+                text = (name, f"{cpu:.1f}%", f"{mem:.1f}%")
+            else:
+                text = ("", "", "")
+            if text != shown:
+                name_label.configure(text=text[0])
+                cpu_label.configure(text=text[1])
+                mem_label.configure(text=text[2])
+                row_frame.configure(fg_color=ROW_COLOR if text[0] else "transparent")
+                widgets[4] = text
+
+        total = len(self.rows)
+        if total > VISIBLE_ROWS:
+            self.scrollbar.set(self.offset / total, (self.offset + VISIBLE_ROWS) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.rows))
+        elif action == "scroll":
+            step = VISIBLE_ROWS if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        # Windows reports multiples of 120, macOS small values: only the direction is used
+        self.scroll_to(self.offset + (-3 if event.delta > 0 else 3))
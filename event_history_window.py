@@ -0,0 +1,91 @@
+import customtkinter as ctk
+from database_manager import get_database_manager
+
+PAGE_SIZE = 15
+
+# Filter button label -> event_type stored in the events table (None = all types)
+EVENT_FILTERS = {"All": None, "Alerts": "alert", "Reports": "report_export"}
+TYPE_COLORS = {"alert": "#E94B3C", "report_export": "#4A90E2"}
+
+class EventHistoryWindow(ctk.CTkToplevel):
+    """
+    Shows the event journal one page at a time, newest first.
+    Pages are fetched with keyset queries, so browsing stays fast no matter
+    how many events have been recorded. The row widgets are created once and
+    only their text changes when paging.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Alert History")
+        self.geometry("700x520")
+        self.configure(fg_color="#2C324A")
+
+        self.db = get_database_manager()
+        self.event_type = None
+        self.page = []
+
+        self.filter_button = ctk.CTkSegmentedButton(
+            self, values=list(EVENT_FILTERS), command=self.on_filter_changed)
+        self.filter_button.set("All")
+        self.filter_button.pack(pady=(15, 10))
+
+        list_frame = ctk.CTkFrame(self, fg_color="#24293E")
+        list_frame.pack(expand=True, fill="both", padx=15)
+        list_frame.grid_columnconfigure(2, weight=1)
+
+        # A fixed pool of rows, reused for every page
+        self.rows = []
+        for i in range(PAGE_SIZE):
+            time_label = ctk.CTkLabel(list_frame, text="", font=("Segoe UI", 12), text_color="#AAB1C2", anchor="w")
+            type_label = ctk.CTkLabel(list_frame, text="", font=("Segoe UI Bold", 12), anchor="w", width=110)
+            message_label = ctk.CTkLabel(list_frame, text="", font=("Segoe UI", 12), anchor="w")
+            time_label.grid(row=i, column=0, sticky="w", padx=(10, 5), pady=2)
+            type_label.grid(row=i, column=1, sticky="w", padx=5, pady=2)
+            message_label.grid(row=i, column=2, sticky="w", padx=(5, 10), pady=2)
+            self.rows.append((time_label, type_label, message_label))
+
+        nav_frame = ctk.CTkFrame(self, fg_color="transparent")
+        nav_frame.pack(fill="x", padx=15, pady=10)
+        self.newer_button = ctk.CTkButton(nav_frame, text="◀ Newer", width=90, command=self.show_newer)
+        self.newer_button.pack(side="left")
+        self.older_button = ctk.CTkButton(nav_frame, text="Older ▶", width=90, command=self.show_older)
+        self.older_button.pack(side="right")
+        self.page_label = ctk.CTkLabel(nav_frame, text="", font=("Segoe UI", 12), text_color="#AAB1C2")
+        self.page_label.pack(expand=True)
+
+        self.show_latest()
+
+    def on_filter_changed(self, value):
+        self.event_type = EVENT_FILTERS.get(value)
+        self.show_latest()
+
+    def show_latest(self):
+        self.display(self.db.get_events(event_type=self.event_type, limit=PAGE_SIZE))
+
+    def show_older(self):
+        if not self.page: return
+        rows = self.db.get_events(event_type=self.event_type, before_id=self.page[-1][0], limit=PAGE_SIZE)
+        if rows: self.display(rows)
+
+    def show_newer(self):
+        if not self.page: return
+        rows = self.db.get_events(event_type=self.event_type, after_id=self.page[0][0], limit=PAGE_SIZE)
+        if rows: self.display(rows)
+
+    def display(self, rows):
+        self.page = rows
+        for i, (time_label, type_label, message_label) in enumerate(self.rows):
+            if i < len(rows):
+                _, timestamp, event_type, message = rows[i]
+                time_label.configure(text=timestamp)
+                type_label.configure(text=event_type, text_color=TYPE_COLORS.get(event_type, "#2CC990"))
+                message_label.configure(text=(message or "").replace("\n", " "))
+            else:
+                time_label.configure(text="")
+                type_label.configure(text="")
+                message_label.configure(text="")
+
+        if rows:
+            self.page_label.configure(text=f"Events #{rows[-1][0]} – #{rows[0][0]}")
+        else:
+            self.page_label.configure(text="No events recorded yet.")
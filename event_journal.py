@@ -0,0 +1,67 @@
+import queue
+import threading
+from datetime import datetime
+from database_manager import get_database_manager
+
+# --- Configuration ---
+QUEUE_SIZE = 10000    # Events held in memory before new ones are dropped
+BATCH_SIZE = 500      # Maximum events written per transaction
+FLUSH_INTERVAL = 1.0  # Seconds the writer waits for more events before checking again
+
+_STOP = object()  # Sentinel telling the writer thread to finish
+
+class EventJournal:
+    """
+    Write-behind journal for the events table.
+
+    log_event() only puts the event on a bounded in-memory queue, so it never
+    blocks the caller (e.g. the UI thread). A background thread drains the
+    queue and writes the events to SQLite in batches. If the queue is full,
+    new events are dropped and counted in 'dropped' rather than waiting.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or get_database_manager()
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._writer_loop, name="event-journal", daemon=True)
+        self._thread.start()
+
+    def log_event(self, event_type, message=""):
+        """Queues an event for writing. Never blocks."""
+        event = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), event_type, message)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Writes out everything still queued and stops the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _writer_loop(self):
+        running = True
+        while running:
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            # Group whatever else is already waiting into the same transaction
+            batch = [first]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if _STOP in batch:
+                running = False
+                batch = [event for event in batch if event is not _STOP]
+
+            if batch:
+                try:
+                    self.db.insert_events(batch)
+                except Exception as e:
+                    print(f"Error writing events: {e}")
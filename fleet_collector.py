@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import socket
+import sqlite3
+import threading
+
+# --- Configuration ---
+COLLECTOR_HOST = "127.0.0.1"
+COLLECTOR_PORT = 8765
+FLEET_DB_FILENAME = "fleet_data.db"
+GROUP_COMMIT_ROWS = 5000     # Commit as soon as this many rows are waiting...
+GROUP_COMMIT_DELAY = 0.05    # ...or after this many seconds, whichever comes first
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+# Columns an agent may send; everything else in a payload is ignored
+FLEET_METRICS = ["cpu_load", "memory_usage", "battery_percentage", "is_charging"]
+
+class FleetStore:
+    """
+    SQLite store for metrics from many hosts.
+    Rows are clustered by (host_id, timestamp), so each host's history is
+    a contiguous partition of the table and per-host scans stay cheap.
+    """
+    def __init__(self, db_path=FLEET_DB_FILENAME):
+        self.db_path = db_path
+        self._host_ids = {}
+        # Writes run in worker threads; the lock serializes use of the write connection
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS hosts (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS fleet_metrics (
+                host_id INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                cpu_load REAL,
+                memory_usage REAL,
+                battery_percentage INTEGER,
+                is_charging INTEGER,
+                PRIMARY KEY (host_id, timestamp)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_fleet_timestamp ON fleet_metrics (timestamp)')
+        self.conn.commit()
+        # Queries use their own read-only connection: with WAL they read a snapshot and
+        # never wait for (or hold up) the group commits on the write connection
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def _get_host_id(self, name):
+        host_id = self._host_ids.get(name)
+        if host_id is None:
+            self.conn.execute('INSERT OR IGNORE INTO hosts (name) VALUES (?)', (name,))
+            host_id = self.conn.execute('SELECT id FROM hosts WHERE name = ?', (name,)).fetchone()[0]
+            self._host_ids[name] = host_id
+        return host_id
+
+    def write_batches(self, batches):
+        """
+        Writes several (host, rows) batches in one transaction (a group commit).
+        Re-sent rows replace the stored ones, so agents can safely retry.
+        """
+        with self.lock:
+            records = []
+            for host, rows in batches:
+                host_id = self._get_host_id(host)
+                for row in rows:
+                    records.append((host_id, row['timestamp'], *(row.get(col) for col in FLEET_METRICS)))
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO fleet_metrics (host_id, timestamp, cpu_load, memory_usage, battery_percentage, is_charging)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', records)
+            self.conn.commit()
+            return len(records)
+
+    def get_percentiles(self, metric, since=None, percentiles=(50, 90, 95, 99)):
+        """
+        Fleet-wide nearest-rank percentiles of 'metric' over all samples since 'since'.
+        Each percentile is picked by SQLite (ORDER BY ... LIMIT 1 OFFSET rank), so no
+        samples are copied into Python.
+        """
+        if metric not in FLEET_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        where, params = f"WHERE {metric} IS NOT NULL", []
+        if since is not None:
+            where += " AND timestamp >= ?"
+            params.append(since)
+        with self._read_lock:
+            self._read_conn.execute('BEGIN')  # One snapshot for the count and every percentile
+            try:
+                count = self._read_conn.execute(f'SELECT COUNT(*) FROM fleet_metrics {where}', params).fetchone()[0]
+                result = {}
+                for p in (percentiles if count else ()):
+                    rank = min(max(int(round(p / 100 * count)) - 1, 0), count - 1)
+                    result[f"p{p}"] = self._read_conn.execute(
+                        f'SELECT {metric} FROM fleet_metrics {where} ORDER BY {metric} LIMIT 1 OFFSET ?',
+                        (*params, rank)).fetchone()[0]
+            finally:
+                self._read_conn.rollback()
+        return result
+
+    def get_worst_hosts(self, metric, since=None, limit=10):
+        """Hosts with the highest average 'metric' since 'since', as (host, average, samples) tuples."""
+        if metric not in FLEET_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        where, params = "", []
+        if since is not None:
+            where, params = "WHERE m.timestamp >= ?", [since]
+        with self._read_lock:
+            return self._read_conn.execute(f'''
+                SELECT h.name, AVG(m.{metric}) AS average, COUNT(*) AS samples
+                FROM fleet_metrics m JOIN hosts h ON h.id = m.host_id
+                {where}
+                GROUP BY m.host_id
+                ORDER BY average DESC
+                LIMIT ?
+            ''', (*params, limit)).fetchall()
+
+    def close(self):
+        self._read_conn.close()
+        self.conn.close()
+
+
+def validate_ingest(host, rows):
+    """Raises ValueError unless 'host' and 'rows' form a batch that write_batches can store."""
+    if not isinstance(host, str) or not host:
+        raise ValueError("'host' must be a non-empty string")
+    if not isinstance(rows, list):
+        raise ValueError("'metrics' must be a list")
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"metrics[{i}] is not an object")
+        if not isinstance(row.get("timestamp"), str):
+            raise ValueError(f"metrics[{i}] has no 'timestamp' string")
+        for metric in FLEET_METRICS:
+            value = row.get(metric)
+            if value is not None and not isinstance(value, (int, float)):
+                raise ValueError(f"metrics[{i}]['{metric}'] must be a number or null")
+
+
+class FleetCollector:
+    """
+    asyncio daemon that receives metric batches from many data loggers.
+
+    Agents connect over TCP and send newline-delimited JSON requests:
+        {"op": "ingest", "host": "...", "metrics": [{"timestamp": ..., "cpu_load": ...}, ...]}
+        {"op": "percentiles", "metric": "cpu_load", "since": "..."}
+        {"op": "worst_hosts", "metric": "cpu_load", "since": "...", "limit": 10}
+    Each request gets one JSON line back. Ingested batches from all
+    connections are queued and written together in group commits; an ingest
+    is acknowledged only after its commit.
+    """
+    def __init__(self, store, host=COLLECTOR_HOST, port=COLLECTOR_PORT):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.rows_ingested = 0
+        self.commits = 0
+        self._queue = None
+        self._server = None
+        self._writer_task = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._group_commit_loop())
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=MAX_LINE_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]  # In case port 0 was requested
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self._queue.join()
+        self._writer_task.cancel()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Fleet collector listening on {self.host}:{self.port} (store: {self.store.db_path})")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE_BYTES: the rest of the line cannot be told apart from the next request
+                    writer.write(json.dumps({"error": f"Request longer than {MAX_LINE_BYTES} bytes"}).encode() + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    response = await self._handle_request(json.loads(line))
+                except Exception as e:
+                    response = {"error": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request):
+        op = request.get("op", "ingest")
+        if op == "ingest":
+            rows = request.get("metrics", [])
+            # Checked here, before queuing: a bad row would otherwise fail the whole group commit
+            validate_ingest(request.get("host"), rows)
+            done = asyncio.get_running_loop().create_future()
+            await self._queue.put((request["host"], rows, done))
+            await done
+            return {"accepted": len(rows)}
+        if op == "percentiles":
+            # Queries run in a worker thread on the read connection, so they never stall ingestion
+            percentiles = await asyncio.to_thread(
+                self.store.get_percentiles, request["metric"], request.get("since"))
+            return {"percentiles": percentiles}
+        if op == "worst_hosts":
+            hosts = await asyncio.to_thread(
+                self.store.get_worst_hosts, request["metric"], request.get("since"), request.get("limit", 10))
+            return {"hosts": hosts}
+        raise ValueError(f"Unknown op: {op}")
+
+    async def _group_commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            row_count = len(pending[0][1])
+            deadline = loop.time() + GROUP_COMMIT_DELAY
+
+            # Keep gathering batches until the group is big enough or the delay runs out
+            while row_count < GROUP_COMMIT_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                row_count += len(item[1])
+
+            try:
+                written = await asyncio.to_thread(self.store.write_batches, [(host, rows) for host, rows, _ in pending])
+                self.rows_ingested += written
+                self.commits += 1
+                for _, _, done in pending:
+                    done.set_result(None)
+            except Exception as e:
+                for _, _, done in pending:
+                    done.set_exception(e)
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+
+class FleetClient:
+    """
+    Blocking client used by data_logger to ship its entries to a collector.
+    Entries are buffered and sent in batches. If the collector cannot be
+    reached, the batch stays buffered (up to 'max_buffered' entries) and is
+    retried with the next one.
+    """
+    def __init__(self, address, batch_size=10, hostname=None, max_buffered=10000, timeout=5.0):
+        self.address = address
+        self.batch_size = batch_size
+        self.hostname = hostname or socket.gethostname()
+        self.max_buffered = max_buffered
+        self.timeout = timeout
+        self.buffer = []
+        self._sock = None
+        self._reader = None
+
+    def add(self, metrics):
+        """Buffers one logger entry and sends the batch once it is full."""
+        row = {key: metrics.get(key) for key in ["timestamp", *FLEET_METRICS]}
+        if row['battery_percentage'] == "N/A":
+            row['battery_percentage'] = None  # No battery; the collector only accepts numbers
+        self.buffer.append(row)
+        if len(self.buffer) > self.max_buffered:
+            self.buffer = self.buffer[-self.max_buffered:]
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Sends everything buffered. Returns True on success."""
+        if not self.buffer:
+            return True
+        try:
+            self.request({"op": "ingest", "host": self.hostname, "metrics": self.buffer})
+            self.buffer = []
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Fleet collector unavailable ({e}); keeping {len(self.buffer)} entries buffered.")
+            self.close()
+            return False
+
+    def request(self, payload):
+        if self._sock is None:
+            self._sock = socket.create_connection(self.address, timeout=self.timeout)
+            self._reader = self._sock.makefile("rb")
+        self._sock.sendall(json.dumps(payload).encode() + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Collector closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collects metrics from many data loggers.")
+    parser.add_argument("--host", default=COLLECTOR_HOST)
+    parser.add_argument("--port", type=int, default=COLLECTOR_PORT)
+    parser.add_argument("--db", default=FLEET_DB_FILENAME)
+    args = parser.parse_args()
+
+    store = FleetStore(args.db)
+    collector = FleetCollector(store, args.host, args.port)
+    try:
+        asyncio.run(collector.serve_forever())
+    except KeyboardInterrupt:
+        print(f"\nCollector stopped. {collector.rows_ingested} rows in {collector.commits} commits.")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
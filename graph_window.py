@@ -22,10 +22,10 @@ class GraphWindow(ctk.CTkToplevel):
 
     def load_data(self):
         """Loads and prepares system log data for plotting."""
-        from database_manager import DatabaseManager
+        from database_manager import get_database_manager
         
         try:
-            db = DatabaseManager()
+            db = get_database_manager()
             df = db.get_recent_history(limit=1000)
             
             if df.empty:
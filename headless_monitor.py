@@ -0,0 +1,128 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from system_monitor import SystemMonitor
+from health_calculator import HealthCalculator
+from anomaly_detector import AnomalyDetector, load_user_profile
+from adaptive_scheduler import AdaptiveScheduler
+from shared_snapshot import SnapshotReader
+from battery_model import TimeToEmptyEstimator, format_minutes
+
+# Headless, terminal-only version of the dashboard for servers and SSH sessions.
+# Only the lightweight modules are loaded (no customtkinter, matplotlib or pandas).
+#   python app.py --headless            # refreshing terminal view
+#   python app.py --headless --json     # one JSON object per line on stdout
+#   python headless_monitor.py --once   # a single sample, then exit
+
+UPDATE_INTERVAL = 2.0
+BAR_WIDTH = 30
+CLEAR_SCREEN = "\033[H\033[J"
+ANSI_COLORS = {'EXCELLENT': "\033[32m", 'GOOD': "\033[33m", 'FAIR': "\033[33m", 'CRITICAL': "\033[31m"}
+ANSI_RESET = "\033[0m"
+
+def build_sample(metrics, health_score, status_info, anomalies, minutes_to_empty):
+    """Flattens one tick into a JSON-friendly dictionary."""
+    sample = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "health_score": round(health_score, 1),
+        "status": status_info['text'],
+        "minutes_to_empty": None if minutes_to_empty is None else round(minutes_to_empty),
+    }
+    for key, data in metrics.items():
+        if data is None:
+            sample[key] = None
+        else:
+            sample[key] = {k: (round(v, 2) if isinstance(v, float) else v) for k, v in data.items() if k != 'display'}
+    sample["alerts"] = [{"metric": key, "title": title, "message": message} for key, title, message in anomalies]
+    return sample
+
+def render_terminal(system_info, metrics, health_score, status_info, alerts, minutes_to_empty):
+    """Draws the whole view as one string, so the screen is redrawn in a single write."""
+    color = ANSI_COLORS.get(status_info['text'], "")
+    lines = [
+        f"System Health Monitor  |  OS: {system_info['os']}  |  CPU Cores: {system_info['cpu']}",
+        "",
+        f"Health score: {color}{health_score:5.1f} / 100  {status_info['text']}{ANSI_RESET}",
+        "",
+    ]
+    for key, name in [("cpu", "CPU Load"), ("memory", "Memory Usage"), ("disk", "Disk Usage"), ("battery", "Battery")]:
+        data = metrics.get(key)
+        if not data: continue
+        filled = int(round(data['value'] / 100 * BAR_WIDTH))
+        lines.append(f"{name:<13} [{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {data['display']:>6}")
+    if minutes_to_empty is not None:
+        lines.append(f"{'Time to empty':<13} ~{format_minutes(minutes_to_empty)}")
+    for key, name in [("disk_io", "Disk I/O"), ("network", "Network")]:
+        data = metrics.get(key)
+        lines.append(f"{name:<13} {data['display'] if data else '--'}")
+    lines.append("")
+    for title, message in alerts[-3:]:
+        lines.append(f"\033[31m! {title} {message}{ANSI_RESET}")
+    lines.append(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  (Ctrl+C to quit)")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Terminal-only system health monitor.")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per sample instead of a live view")
+    parser.add_argument("--once", action="store_true", help="Take a single sample and exit")
+    parser.add_argument("--interval", type=float, default=UPDATE_INTERVAL, help="Base seconds between samples")
+    parser.add_argument("--journal", action="store_true", help="Record alerts in the database event journal")
+    args = parser.parse_args(argv)
+
+    system_monitor = SystemMonitor()
+    snapshot_reader = SnapshotReader()
+    health_calculator = HealthCalculator()
+    user_profile = load_user_profile()
+    anomaly_detector = AnomalyDetector(user_profile)
+    drain_estimator = TimeToEmptyEstimator(user_profile)
+    scheduler = AdaptiveScheduler(args.interval)
+    system_info = system_monitor.get_system_info()
+
+    journal = None
+    if args.journal:
+        from event_journal import EventJournal  # Pulls in the database layer only when asked for
+        journal = EventJournal()
+        journal.log_event("app_start", "Headless monitor started")
+
+    if args.once:
+        time.sleep(0.5)  # Give the non-blocking CPU reading a short measurement window
+
+    recent_alerts = []
+    try:
+        while True:
+            scheduler.begin_tick()
+            # The data logger's live sample if it is running, otherwise our own
+            metrics = snapshot_reader.latest() or system_monitor.get_all_metrics(cpu_interval=None)
+            anomalies = anomaly_detector.check(metrics)
+            for metric_key, title, message in anomalies:
+                scheduler.report_anomaly()
+                if anomaly_detector.should_alert(metric_key):
+                    recent_alerts.append((title, message))
+                    if journal: journal.log_event("alert", f"{title} {message}")
+            health_score, status_info = health_calculator.calculate_health_score(metrics)
+            minutes_to_empty = drain_estimator.update(metrics)
+
+            if args.json:
+                sys.stdout.write(json.dumps(build_sample(metrics, health_score, status_info, anomalies, minutes_to_empty)) + "\n")
+            else:
+                sys.stdout.write(CLEAR_SCREEN + render_terminal(system_info, metrics, health_score, status_info, recent_alerts, minutes_to_empty) + "\n")
+            sys.stdout.flush()
+
+            scheduler.end_tick(system_cpu=metrics['cpu']['value'])
+            if args.once:
+                break
+            time.sleep(scheduler.next_interval())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        snapshot_reader.detach()
+        if journal:
+            journal.log_event("app_stop", "Headless monitor stopped")
+            journal.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Generates controlled load to check that the monitor, its anomaly alerts and
+# the data logger stay responsive. Replaces the old single-core stress_cpu.py:
+#   python load_generator.py                          # one core at 100% until Ctrl+C (as before)
+#   python load_generator.py --cores 4 --duty 0.6 --duration 120 --timeline run.jsonl
+#   python load_generator.py --memory-mb 2048 --disk-mb 20 --spawn-rate 50 --duration 60
+
+DUTY_PERIOD = 0.1       # Seconds per busy/idle cycle of a CPU worker
+MEMORY_CHUNK_MB = 64    # Memory is allocated and touched in chunks of this size
+DISK_CHUNK_MB = 4       # Largest write before fsync
+DISK_SLOTS_PER_SECOND = 10  # Disk writes are spread over each second in at least this many chunks
+PAGE_SIZE = 4096
+
+
+class Timeline:
+    """Collects timestamped records of what the generator did, as JSON lines."""
+    def __init__(self, path=None):
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.file = open(path, "w") if path else None
+
+    def record(self, event, **details):
+        entry = {
+            "t": round(time.monotonic() - self.started, 3),
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "event": event, **details,
+        }
+        line = json.dumps(entry)
+        with self.lock:
+            print(line, flush=True)
+            if self.file:
+                self.file.write(line + "\n")
+                self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+# --- Workers (run in their own processes) ---
+def cpu_worker(duty, stop_event):
+    """Keeps one core busy for 'duty' of every DUTY_PERIOD."""
+    busy = DUTY_PERIOD * duty
+    while not stop_event.is_set():
+        cycle_start = time.perf_counter()
+        while time.perf_counter() - cycle_start < busy:
+            pass
+        idle = DUTY_PERIOD - (time.perf_counter() - cycle_start)
+        if idle > 0:
+            time.sleep(idle)
+
+
+def memory_worker(target_mb, stop_event, events):
+    """Allocates and touches memory until this process holds about 'target_mb' of RSS."""
+    import psutil
+
+    process = psutil.Process()
+    chunks = []
+    while not stop_event.is_set():
+        rss_mb = process.memory_info().rss / 2**20
+        if rss_mb >= target_mb:
+            break
+        size = int(min(MEMORY_CHUNK_MB, target_mb - rss_mb + 1) * 2**20)
+        chunk = bytearray(size)
+        for offset in range(0, size, PAGE_SIZE):  # Touch every page so it is really resident
+            chunk[offset] = 1
+        chunks.append(chunk)
+    events.put(("memory_target_reached", {"rss_mb": round(process.memory_info().rss / 2**20, 1)}))
+    stop_event.wait()
+
+
+def disk_worker(mb_per_second, directory, stop_event, events):
+    """Writes and fsyncs 'mb_per_second' MB per second, replacing the file each second."""
+    path = os.path.join(directory, f"load_generator_{os.getpid()}.tmp")
+    # Equal chunks of at most DISK_CHUNK_MB, spread over the second, so any rate is met exactly
+    chunks_per_second = max(math.ceil(mb_per_second / DISK_CHUNK_MB), DISK_SLOTS_PER_SECOND)
+    chunk = os.urandom(int(mb_per_second / chunks_per_second * 2**20))
+    started = time.monotonic()
+    chunks = 0
+    f = None
+    try:
+        # Each chunk is written at the end of its slot, so the total never runs ahead of the rate
+        while not stop_event.wait(max(started + (chunks + 1) / chunks_per_second - time.monotonic(), 0)):
+            if chunks % chunks_per_second == 0:
+                if f:
+                    f.close()
+                    os.remove(path)
+                f = open(path, "wb")
+            f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            chunks += 1
+    finally:
+        if f:
+            f.close()
+        if os.path.exists(path):
+            os.remove(path)
+        events.put(("disk_worker_stopped", {"written_mb": round(chunks * len(chunk) / 2**20, 1)}))
+
+
+def spawn_short_lived(rate, stop_event, timeline):
+    """Starts 'rate' trivial Python processes per second (runs as a thread)."""
+    interval = 1.0 / rate
+    spawned = 0
+    running = []
+    while not stop_event.is_set():
+        running.append(subprocess.Popen([sys.executable, "-c", "pass"]))
+        spawned += 1
+        running = [p for p in running if p.poll() is None]
+        stop_event.wait(interval)
+    for p in running:
+        p.wait()
+    timeline.record("spawner_stopped", spawned=spawned)
+
+
+def run(args):
+    timeline = Timeline(args.timeline)
+    stop_event = mp.Event()
+    events = mp.Queue()
+    processes = []
+
+    timeline.record("start", cores=args.cores, duty=args.duty, duration=args.duration,
+                    memory_mb=args.memory_mb, disk_mb=args.disk_mb, spawn_rate=args.spawn_rate)
+
+    for _ in range(args.cores):
+        processes.append(mp.Process(target=cpu_worker, args=(args.duty, stop_event), daemon=True))
+    if args.memory_mb:
+        processes.append(mp.Process(target=memory_worker, args=(args.memory_mb, stop_event, events), daemon=True))
+    if args.disk_mb:
+        processes.append(mp.Process(target=disk_worker, args=(args.disk_mb, args.disk_dir, stop_event, events), daemon=True))
+    for p in processes:
+        p.start()
+    timeline.record("load_started", workers=len(processes), pids=[p.pid for p in processes])
+
+    spawner = None
+    if args.spawn_rate:
+        spawner = threading.Thread(target=spawn_short_lived, args=(args.spawn_rate, stop_event, timeline), daemon=True)
+        spawner.start()
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                # Never waits past the deadline, so the workers are stopped on time
+                timeout = 0.2 if deadline is None else max(min(0.2, deadline - time.monotonic()), 0)
+                event, details = events.get(timeout=timeout)
+                timeline.record(event, **details)
+            except queue.Empty:
+                pass
+        timeline.record("duration_elapsed")
+    except KeyboardInterrupt:
+        timeline.record("interrupted")
+    finally:
+        stop_event.set()
+        for p in processes:
+            p.join(timeout=10)
+        if spawner:
+            spawner.join(timeout=10)
+        while not events.empty():
+            event, details = events.get()
+            timeline.record(event, **details)
+        timeline.record("load_stopped")
+        timeline.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates controlled CPU, memory, disk and process load.")
+    parser.add_argument("--cores", type=int, default=1, help="CPU worker processes (default 1)")
+    parser.add_argument("--duty", type=float, default=1.0, help="Busy fraction of each CPU worker, 0-1 (default 1.0)")
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to run; 0 runs until Ctrl+C")
+    parser.add_argument("--memory-mb", type=int, default=0, help="Hold this much RSS in a worker process")
+    parser.add_argument("--disk-mb", type=float, default=0, help="MB per second to write and fsync")
+    parser.add_argument("--disk-dir", default=tempfile.gettempdir(), help="Directory for the disk churn file")
+    parser.add_argument("--spawn-rate", type=float, default=0, help="Short-lived processes started per second")
+    parser.add_argument("--timeline", help="Also write the JSON-lines timeline to this file")
+    args = parser.parse_args()
+
+    if not 0 < args.duty <= 1:
+        parser.error("--duty must be between 0 and 1")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
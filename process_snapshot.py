@@ -0,0 +1,75 @@
+import threading
+import time
+import psutil
+from system_monitor import IGNORED_PROCESSES
+
+REFRESH_INTERVAL = 2.0  # Seconds between process-table scans while someone is watching
+
+class ProcessSnapshot:
+    """
+    A process table that is refreshed in a background thread.
+
+    One scan per interval collects name, CPU and memory for every process and
+    publishes it as an immutable list, so any number of views can read the
+    latest table without touching psutil themselves. Scanning only runs while
+    at least one view has called acquire() and not yet release().
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL):
+        self.interval = interval
+        self.processes = []  # (pid, name, cpu_percent, memory_percent) tuples, replaced atomically
+        self.version = 0     # Incremented after every scan
+        self.timestamp = None
+        self._users = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def acquire(self):
+        """Registers a viewer and starts scanning if needed."""
+        with self._lock:
+            self._users += 1
+            self._wake.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._scan_loop, name="process-snapshot", daemon=True)
+                self._thread.start()
+
+    def release(self):
+        """Unregisters a viewer; scanning stops when the last one leaves."""
+        with self._lock:
+            self._users = max(self._users - 1, 0)
+            if self._users == 0:
+                self._wake.set()
+
+    def _scan_loop(self):
+        while True:
+            with self._lock:
+                if self._users == 0:
+                    self._thread = None
+                    self._wake.clear()
+                    return
+            self.scan()
+            self._wake.wait(self.interval)
+
+    def scan(self):
+        """Reads the whole process table once and publishes it."""
+        processes = []
+        for p in psutil.process_iter(['name', 'cpu_percent', 'memory_percent']):
+            info = p.info
+            name = info['name']
+            if not name or name in IGNORED_PROCESSES:
+                continue
+            processes.append((p.pid, name, info['cpu_percent'] or 0.0, info['memory_percent'] or 0.0))
+        self.processes = processes
+        self.timestamp = time.time()
+        self.version += 1
+
+
+_shared_snapshot = None
+
+def get_process_snapshot():
+    """Returns the process-wide ProcessSnapshot shared by all views."""
+    global _shared_snapshot
+    if _shared_snapshot is None:
+        _shared_snapshot = ProcessSnapshot()
+    return _shared_snapshot
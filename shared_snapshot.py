@@ -0,0 +1,183 @@
+import atexit
+import math
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+import psutil
+from system_monitor import io_metrics_from_rates
+from adaptive_scheduler import MAX_INTERVAL_FACTOR
+
+# Live samples shared between processes through a ring buffer in shared memory.
+# While a dashboard or headless monitor is reading, data_logger.py samples every
+# PUBLISH_INTERVAL (stretched by its scheduler) and publishes each sample; the
+# readers use the newest one instead of calling psutil themselves. Every read
+# stamps a heartbeat in the header, so the logger stops once nobody is reading.
+
+SEGMENT_NAME = "laptop_health_snapshots"
+RING_CAPACITY = 64       # Samples kept in the ring
+PUBLISH_INTERVAL = 2.0   # Base seconds between published samples
+STALE_AFTER = (MAX_INTERVAL_FACTOR + 1) * PUBLISH_INTERVAL  # Samples older than this are ignored (logger stopped or stuck)
+READER_TIMEOUT = 30.0    # Seconds without a read before the logger stops publishing
+READ_ATTEMPTS = 100      # Seqlock retries before a read gives up
+
+MAGIC = b"LHS2"
+# magic, capacity, record size, writer pid, sequence (odd while a write is in progress), samples written,
+# wall time of the latest read
+HEADER = struct.Struct("<4sIII QQd")
+SEQ_OFFSET = 16
+COUNT_OFFSET = 24
+HEARTBEAT_OFFSET = 32
+# wall time, cpu, memory, disk, battery, has battery, charging, then the IoRateMonitor rates
+RECORD = struct.Struct("<5d BB 6d")
+IO_FIELDS = ["disk_read_bps", "disk_write_bps", "disk_iops", "disk_await_ms", "net_sent_bps", "net_recv_bps"]
+
+
+def _attach(name):
+    """Opens an existing segment without handing it to this process's resource tracker."""
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # Otherwise the tracker unlinks the segment when this process exits (Python < 3.13 always tracks it)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _encode(metrics, timestamp):
+    battery = metrics.get('battery')
+    rates = {**(metrics.get('disk_io') or {}), **(metrics.get('network') or {})}
+    return RECORD.pack(
+        timestamp, metrics['cpu']['value'], metrics['memory']['value'], metrics['disk']['value'],
+        battery['value'] if battery else math.nan, battery is not None, bool(battery and battery['charging']),
+        *(math.nan if rates.get(field) is None else rates[field] for field in IO_FIELDS))
+
+
+def _decode(record):
+    """Turns a packed record back into (timestamp, metrics) in SystemMonitor.get_all_metrics() form."""
+    timestamp, cpu, memory, disk, battery, has_battery, charging, *io_rates = RECORD.unpack(record)
+    metrics = {
+        "cpu": {'value': cpu, 'display': f"{cpu:.1f}%"},
+        "memory": {'value': memory, 'display': f"{memory:.1f}%"},
+        "disk": {'value': disk, 'display': f"{disk:.1f}%"},
+        "battery": {'value': battery, 'display': f"{battery:.0f}%", 'charging': bool(charging)} if has_battery else None,
+        **io_metrics_from_rates({field: None if math.isnan(v) else v for field, v in zip(IO_FIELDS, io_rates)}),
+    }
+    return timestamp, metrics
+
+
+class SnapshotWriter:
+    """
+    Owns the shared ring buffer and appends samples to it.
+
+    Writes are guarded by a seqlock: the sequence number in the header is odd
+    while a record is being written and even otherwise, so readers never wait
+    on the writer - they just retry if the sequence changed under them.
+    """
+    def __init__(self, name=SEGMENT_NAME, capacity=RING_CAPACITY):
+        size = HEADER.size + capacity * RECORD.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a logger that did not shut down cleanly, or still in use
+            self.shm = _attach(name)
+            magic, _, _, pid, _, _, _ = HEADER.unpack_from(self.shm.buf)
+            if magic == MAGIC and psutil.pid_exists(pid):
+                self.shm.close()
+                raise RuntimeError(f"Another process (pid {pid}) is already publishing snapshots")
+            if self.shm.size < size:
+                self.shm.close()
+                raise RuntimeError(f"Existing shared memory segment '{name}' is too small")
+            if os.name == "posix":
+                # The segment is ours now, so it is cleaned up like a newly created one
+                from multiprocessing import resource_tracker
+                resource_tracker.register(self.shm._name, "shared_memory")
+        self.capacity = capacity
+        self.count = 0
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, capacity, RECORD.size, os.getpid(), self.seq, self.count, 0.0)
+
+    def reader_attached(self, timeout=READER_TIMEOUT):
+        """Whether a reader has read the ring within the last 'timeout' seconds."""
+        heartbeat = struct.unpack_from("<d", self.shm.buf, HEARTBEAT_OFFSET)[0]
+        return time.time() - heartbeat <= timeout
+
+    def publish(self, metrics, timestamp=None):
+        """Appends one get_all_metrics() result, overwriting the oldest sample once the ring is full."""
+        record = _encode(metrics, timestamp or time.time())
+        offset = HEADER.size + (self.count % self.capacity) * RECORD.size
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, SEQ_OFFSET, self.seq)
+        self.shm.buf[offset:offset + RECORD.size] = record
+        self.count += 1
+        struct.pack_into("<Q", self.shm.buf, COUNT_OFFSET, self.count)
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, SEQ_OFFSET, self.seq)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SnapshotReader:
+    """
+    Read-only view of the ring buffer (apart from the heartbeat it stamps on
+    every read). Attaching is retried on every read, so a reader started before
+    the logger picks it up as soon as it appears, and a segment whose samples
+    have gone stale is dropped again. An attached reader is detached at exit,
+    since the shared memory cannot be closed while the view is still alive.
+    """
+    def __init__(self, name=SEGMENT_NAME, stale_after=STALE_AFTER):
+        self.name = name
+        self.stale_after = stale_after
+        self.shm = None
+        self.buf = None
+
+    def _attach(self):
+        try:
+            shm = _attach(self.name)
+        except OSError:
+            return False
+        if shm.size < HEADER.size or bytes(shm.buf[:4]) != MAGIC:
+            shm.close()
+            return False
+        self.shm, self.buf = shm, shm.buf.toreadonly()
+        atexit.register(self.detach)
+        return True
+
+    def detach(self):
+        if self.shm:
+            self.buf.release()
+            self.shm.close()
+            atexit.unregister(self.detach)
+        self.shm = self.buf = None
+
+    def _read_latest(self):
+        for _ in range(READ_ATTEMPTS):
+            _, capacity, record_size, _, seq, count, _ = HEADER.unpack_from(self.buf)
+            if seq % 2:
+                time.sleep(0)  # A write is in progress
+                continue
+            if count == 0:
+                return None
+            offset = HEADER.size + ((count - 1) % capacity) * record_size
+            record = bytes(self.buf[offset:offset + RECORD.size])
+            if struct.unpack_from("<Q", self.buf, SEQ_OFFSET)[0] == seq:
+                return _decode(record)
+        return None
+
+    def latest(self):
+        """Returns the newest sample's metrics, or None if no logger is publishing fresh samples."""
+        if self.shm is None and not self._attach():
+            return None
+        # Tells the logger someone is reading, so it starts (or keeps) publishing
+        struct.pack_into("<d", self.shm.buf, HEARTBEAT_OFFSET, time.time())
+        sample = self._read_latest()
+        if sample is None:
+            return None
+        timestamp, metrics = sample
+        if time.time() - timestamp > self.stale_after:
+            self.detach()
+            return None
+        return metrics
+
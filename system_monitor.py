@@ -1,11 +1,146 @@
 import psutil
+import os
 import platform
+import re
+import time
+
+# Placeholder entries that are not real processes and would always top the CPU list
+IGNORED_PROCESSES = ["System Idle Process", "System"]
+
+# Virtual devices whose traffic would be double counted or is not real I/O
+# (dm-/md: LVM, LUKS and software RAID volumes, whose I/O is also counted on the disks below them)
+IGNORED_DISK_PREFIXES = ("loop", "ram", "zram", "dm-", "md")
+IGNORED_NICS = ("lo", "Loopback Pseudo-Interface 1")
+# Container, bridge, VM and tunnel interfaces, whose traffic also crosses a physical NIC
+IGNORED_NIC_PREFIXES = ("veth", "docker", "br-", "virbr", "vnet", "ifb", "tun", "tap")
+SYS_CLASS_NET = "/sys/class/net"  # Linux: only hardware interfaces have a 'device' link here
+
+def format_rate(bytes_per_second):
+    """Formats a byte rate for display, e.g. '1.2 MB/s'."""
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bytes_per_second < 1024:
+            return f"{bytes_per_second:.0f} {unit}" if unit == "B/s" else f"{bytes_per_second:.1f} {unit}"
+        bytes_per_second /= 1024
+    return f"{bytes_per_second:.1f} GB/s"
+
+class CounterRates:
+    """
+    Turns cumulative per-device counters into deltas between consecutive snapshots,
+    timed with the monotonic clock.
+    Devices that appeared since the previous snapshot (hotplug) are skipped
+    until they have a baseline, devices that disappeared are dropped, and a
+    device whose counters went backwards (reset or wraparound) is skipped for
+    that interval instead of producing a huge negative rate.
+    """
+    def __init__(self):
+        self._previous = None  # (monotonic time, {device: counters})
+
+    def update(self, counters):
+        """Returns (elapsed seconds, {device: {field: delta}}), or None on the first snapshot."""
+        now = time.monotonic()
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None:
+            return None
+        elapsed = now - previous[0]
+        if elapsed <= 0:
+            return None
+
+        deltas = {}
+        for device, current in counters.items():
+            before = previous[1].get(device)
+            if before is None:
+                continue
+            delta = {field: value - getattr(before, field) for field, value in current._asdict().items()}
+            if any(value < 0 for value in delta.values()):
+                continue
+            deltas[device] = delta
+        return elapsed, deltas
+
+class IoRateMonitor:
+    """
+    Disk I/O and network throughput rates from one cheap counter snapshot per call.
+    Rates cover the time since the previous call, so nothing ever blocks.
+    """
+    def __init__(self):
+        self.disk_rates = CounterRates()
+        self.net_rates = CounterRates()
+
+    @staticmethod
+    def _physical_disks(counters):
+        """Drops virtual devices and partitions whose parent disk is also listed (e.g. sda1 next to sda)."""
+        disks = {name: c for name, c in counters.items() if not name.startswith(IGNORED_DISK_PREFIXES)}
+        return {name: c for name, c in disks.items()
+                if not any(name != parent and re.fullmatch(re.escape(parent) + r"p?\d+", name) for parent in disks)}
+
+    @staticmethod
+    def _physical_nics(counters):
+        """Drops loopback and virtual interfaces, preferring the ones Linux reports as hardware."""
+        nics = {nic: c for nic, c in counters.items() if nic not in IGNORED_NICS and not nic.startswith(IGNORED_NIC_PREFIXES)}
+        if os.path.isdir(SYS_CLASS_NET):
+            hardware = {nic: c for nic, c in nics.items() if os.path.exists(os.path.join(SYS_CLASS_NET, nic, "device"))}
+            if hardware:  # Inside a container every interface is virtual; keep them rather than report nothing
+                nics = hardware
+        return nics
+
+    def sample(self):
+        """
+        Returns a dict with disk_read_bps, disk_write_bps, disk_iops, disk_await_ms,
+        net_sent_bps and net_recv_bps (None until two snapshots have been taken).
+        """
+        rates = dict.fromkeys(
+            ["disk_read_bps", "disk_write_bps", "disk_iops", "disk_await_ms", "net_sent_bps", "net_recv_bps"])
+
+        try:
+            disk_counters = self._physical_disks(psutil.disk_io_counters(perdisk=True) or {})
+        except (RuntimeError, OSError):
+            disk_counters = {}
+        disk = self.disk_rates.update(disk_counters)
+        if disk:
+            elapsed, deltas = disk
+            totals = {field: sum(d[field] for d in deltas.values())
+                      for field in ("read_bytes", "write_bytes", "read_count", "write_count", "read_time", "write_time")}
+            operations = totals["read_count"] + totals["write_count"]
+            rates["disk_read_bps"] = totals["read_bytes"] / elapsed
+            rates["disk_write_bps"] = totals["write_bytes"] / elapsed
+            rates["disk_iops"] = operations / elapsed
+            # Average time each request spent queued and serviced (read_time/write_time are in ms)
+            rates["disk_await_ms"] = (totals["read_time"] + totals["write_time"]) / operations if operations else 0.0
+
+        try:
+            net_counters = self._physical_nics(psutil.net_io_counters(pernic=True) or {})
+        except OSError:
+            net_counters = {}
+        net = self.net_rates.update(net_counters)
+        if net:
+            elapsed, deltas = net
+            rates["net_sent_bps"] = sum(d["bytes_sent"] for d in deltas.values()) / elapsed
+            rates["net_recv_bps"] = sum(d["bytes_recv"] for d in deltas.values()) / elapsed
+        return rates
+
+def io_metrics_from_rates(rates):
+    """Builds the 'disk_io' and 'network' metric entries (with display text) from IoRateMonitor rates."""
+    if rates["disk_iops"] is None:
+        disk_io = None
+    else:
+        disk_io = {**{k: v for k, v in rates.items() if k.startswith("disk_")},
+                   'display': f"R {format_rate(rates['disk_read_bps'])} · W {format_rate(rates['disk_write_bps'])} · "
+                              f"{rates['disk_iops']:.0f} IOPS · {rates['disk_await_ms']:.1f} ms"}
+    if rates["net_sent_bps"] is None:
+        network = None
+    else:
+        network = {**{k: v for k, v in rates.items() if k.startswith("net_")},
+                   'display': f"↓ {format_rate(rates['net_recv_bps'])} · ↑ {format_rate(rates['net_sent_bps'])}"}
+    return {"disk_io": disk_io, "network": network}
 
 class SystemMonitor:
     # --- (No changes to the first part of your class) ---
     def __init__(self):
         self.battery_available = hasattr(psutil, 'sensors_battery') and psutil.sensors_battery() is not None
         self.temps_available = hasattr(psutil, 'sensors_temperatures') and psutil.sensors_temperatures()
+        # Prime the system-wide counter so non-blocking CPU reads are meaningful from the first tick
+        psutil.cpu_percent(interval=None)
+        self.io_monitor = IoRateMonitor()
+        self.io_monitor.sample()
 
     def get_system_info(self):
         uname = platform.uname()
@@ -14,8 +149,9 @@ class SystemMonitor:
     def has_battery(self):
         return self.battery_available
         
-    def get_cpu_metrics(self):
-        cpu_load = psutil.cpu_percent(interval=1)
+    def get_cpu_metrics(self, interval=1):
+        # interval=None measures since the previous call instead of blocking
+        cpu_load = psutil.cpu_percent(interval=interval)
         return {'value': cpu_load, 'display': f"{cpu_load:.1f}%"}
 
     def get_memory_metrics(self):
@@ -31,31 +167,44 @@ class SystemMonitor:
         battery = psutil.sensors_battery()
         return {'value': battery.percent, 'display': f"{battery.percent:.0f}%", 'charging': battery.power_plugged}
 
-    def get_all_metrics(self):
+    def get_io_metrics(self):
+        """Disk I/O and network rates since the previous call, as 'disk_io' and 'network' entries."""
+        return io_metrics_from_rates(self.io_monitor.sample())
+
+    def get_all_metrics(self, cpu_interval=1):
         return {
-            "cpu": self.get_cpu_metrics(), "memory": self.get_memory_metrics(),
+            "cpu": self.get_cpu_metrics(cpu_interval), "memory": self.get_memory_metrics(),
             "disk": self.get_disk_metrics(), "battery": self.get_battery_metrics(),
+            **self.get_io_metrics(),
         }
 
     # --- THIS IS THE UPDATED FUNCTION ---
-    def get_top_processes_by_cpu(self, count=5):
+    def get_top_processes_by_cpu(self, count=5, sample_interval=0.1):
         """
         Returns a list of the top 'count' REAL processes sorted by CPU usage,
         filtering out common system placeholders.
+        All processes are measured over one shared 'sample_interval' window
+        instead of blocking once per process.
         """
         try:
             procs = [p for p in psutil.process_iter(['pid', 'name'])]
-            psutil.cpu_percent(interval=None) 
-            
+
+            # Start every process's CPU counter, wait once, then read them all
+            for p in procs:
+                try:
+                    p.cpu_percent(interval=None)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            time.sleep(sample_interval)
+
             for p in procs:
                 try:
-                    p.info['cpu_percent'] = psutil.Process(p.info['pid']).cpu_percent(interval=0.1)
+                    p.info['cpu_percent'] = p.cpu_percent(interval=None)
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     p.info['cpu_percent'] = 0
 
             # --- THE FIX: Filter out the placeholder processes ---
-            ignore_list = ["System Idle Process", "System"]
-            filtered_procs = [p.info for p in procs if p.info['name'] not in ignore_list]
+            filtered_procs = [p.info for p in procs if p.info['name'] not in IGNORED_PROCESSES]
             # --- END OF FIX ---
 
             sorted_procs = sorted(filtered_procs, key=lambda p: p['cpu_percent'], reverse=True)
@@ -0,0 +1,83 @@
+import math
+from datetime import datetime
+from database_manager import TREND_EPOCH
+
+# Long-term trends and forecasts from the running regression sums that
+# DatabaseManager keeps in trend_sums. Each forecast is computed from 24 rows
+# of sums per metric, so it costs the same however long the history is.
+
+MIN_TREND_DAYS = 2.0        # Span of history needed before a trend is reported
+MIN_T_STATISTIC = 3.0       # The slope must be this many standard errors away from zero
+BASELINE_THRESHOLD = 1.0    # Percentage points per week before a baseline change is reported
+DISK_FULL_HORIZON = 365     # Days; a disk that fills up later than this is not reported
+
+BASELINE_METRICS = [("memory_usage", "Memory baseline"), ("cpu_load", "CPU load baseline")]
+
+def fit_trend(buckets):
+    """
+    Fits y = a[hour] + b * t from per-hour sums (hour, n, sum_t, sum_tt, sum_y, sum_ty, sum_yy):
+    one common slope b (per day) plus one intercept per hour of day, so the
+    daily usage pattern does not show up as a trend.
+    Returns None if the history is too short or too flat to fit.
+    """
+    n = sum(bucket[1] for bucket in buckets)
+    if n < len(buckets) + 3:
+        return None
+    # Within-hour (centered) sums; all of them are differences of the stored running sums
+    s_tt = sum(stt - st * st / k for _, k, st, stt, _, _, _ in buckets)
+    s_ty = sum(sty - st * sy / k for _, k, st, _, sy, sty, _ in buckets)
+    s_yy = sum(syy - sy * sy / k for _, k, _, _, sy, _, syy in buckets)
+    total_t = sum(bucket[2] for bucket in buckets)
+    t_variance = sum(bucket[3] for bucket in buckets) / n - (total_t / n) ** 2
+    span_days = math.sqrt(max(t_variance, 0.0) * 12)  # Span of evenly spread samples with this variance
+    if s_tt <= 0 or span_days < MIN_TREND_DAYS:
+        return None
+
+    slope = s_ty / s_tt
+    residual = max(s_yy - slope * s_ty, 0.0)
+    degrees_of_freedom = n - len(buckets) - 1
+    stderr = math.sqrt(residual / degrees_of_freedom / s_tt)
+    return {
+        'slope_per_day': slope,
+        'stderr': stderr,
+        'span_days': span_days,
+        'samples': n,
+        'intercepts': {hour: (sy - slope * st) / k for hour, k, st, _, sy, _, _ in buckets},
+    }
+
+def is_significant(fit):
+    return fit['stderr'] == 0 or abs(fit['slope_per_day']) / fit['stderr'] >= MIN_T_STATISTIC
+
+def predict(fit, when):
+    """The fitted value at datetime 'when' (using the intercept of its hour of day)."""
+    intercepts = fit['intercepts']
+    intercept = intercepts.get(when.hour, sum(intercepts.values()) / len(intercepts))
+    epoch = datetime.strptime(TREND_EPOCH, "%Y-%m-%d %H:%M:%S")
+    return intercept + fit['slope_per_day'] * ((when - epoch).total_seconds() / 86400)
+
+def describe_trends(trend_sums, current_metrics=None, now=None):
+    """
+    Returns a list of short forecast texts (e.g. "Disk full in ~9 days") for the
+    trends in 'trend_sums' (DatabaseManager.get_trend_sums()) that are worth showing.
+    'current_metrics' (from SystemMonitor) provides the current disk level if available.
+    """
+    now = now or datetime.now()
+    forecasts = []
+
+    disk = fit_trend(trend_sums.get('disk_usage', []))
+    if disk and disk['slope_per_day'] > 0 and is_significant(disk):
+        current = (current_metrics or {}).get('disk')
+        level = current['value'] if current else predict(disk, now)
+        days = (100.0 - level) / disk['slope_per_day']
+        if days <= DISK_FULL_HORIZON:
+            forecasts.append(f"Disk full in ~{max(days, 0):.0f} days (+{disk['slope_per_day']:.2f} pts/day)")
+
+    for metric, label in BASELINE_METRICS:
+        fit = fit_trend(trend_sums.get(metric, []))
+        if not fit or not is_significant(fit):
+            continue
+        weekly = fit['slope_per_day'] * 7
+        if abs(weekly) >= BASELINE_THRESHOLD:
+            direction = "creeping up" if weekly > 0 else "going down"
+            forecasts.append(f"{label} {direction} ~{abs(weekly):.1f} pts/week over {fit['span_days']:.0f} days")
+    return forecasts